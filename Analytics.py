@@ -1,9 +1,83 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
+import math
 import time
-import json
-import os
+from result_cache import get_result_cache
+from semantic_cache import get_semantic_cache
+from metrics_store import (
+    TASK_CODE_GENERATION, TASK_CREW_CHAT, TASK_GEMINI_ANALYSIS, TASK_LABELS, get_metrics_store
+)
+from metrics_aggregator import get_metrics_aggregator
+from tracing import load_traces
+
+# Number of recent traces offered in the waterfall view
+TRACE_LIMIT = 50
+
+
+def span_depths(spans):
+    """Nesting depth of each span in a trace, keyed by span id."""
+    parents = {s["span_id"]: s["parent_id"] for s in spans}
+    depths = {}
+    for span_id in parents:
+        depth, parent = 0, parents[span_id]
+        while parent in parents:
+            depth, parent = depth + 1, parents[parent]
+        depths[span_id] = depth
+    return depths
+
+
+def render_traces():
+    """Waterfall of one recent request plus a per-stage latency breakdown over all recent traces."""
+    st.markdown("<h2>Request Traces</h2>", unsafe_allow_html=True)
+    traces = load_traces(limit=TRACE_LIMIT)
+    if not traces:
+        st.info("No traces recorded yet.")
+        return
+
+    labels = [
+        f"{time.strftime('%H:%M:%S', time.localtime(trace['start']))} - {trace['name']} ({trace['duration']:.2f}s)"
+        for trace in traces
+    ]
+    selected = st.selectbox("Trace", range(len(traces)), format_func=lambda index: labels[index], key="trace_select")
+    trace = traces[selected]
+    depths = span_depths(trace["spans"])
+
+    waterfall_df = pd.DataFrame([
+        {
+            "Stage": f"{'  ' * depths[s['span_id']]}{s['name']} #{number}",
+            "Start": pd.to_datetime(s["start"], unit="s"),
+            "End": pd.to_datetime(s["start"] + s["duration"], unit="s"),
+            "Duration (ms)": round(s["duration"] * 1000, 1),
+            "Span": s["name"].split(".")[0],
+            "Attributes": ", ".join(f"{key}={value}" for key, value in s["attributes"].items()),
+        }
+        for number, s in enumerate(trace["spans"], start=1)
+    ])
+    waterfall = px.timeline(waterfall_df, x_start="Start", x_end="End", y="Stage", color="Span",
+                            hover_data=["Duration (ms)", "Attributes"], template="plotly_dark",
+                            height=max(300, 28 * len(waterfall_df)))
+    waterfall.update_yaxes(autorange="reversed", title=None)
+    waterfall.update_layout(title=f"{trace['name']} waterfall", title_font_size=18, xaxis_title=None)
+    st.plotly_chart(waterfall)
+
+    # Where the time goes across all recent traces, by stage name
+    stage_rows = {}
+    for recent in traces:
+        for s in recent["spans"]:
+            stage_rows.setdefault(s["name"], []).append(s["duration"])
+    breakdown_df = pd.DataFrame([
+        {
+            "Stage": name,
+            "Count": len(durations),
+            "Mean (ms)": round(sum(durations) / len(durations) * 1000, 1),
+            "p95 (ms)": round(sorted(durations)[math.ceil(len(durations) * 0.95) - 1] * 1000, 1),
+            "Total (s)": round(sum(durations), 2),
+        }
+        for name, durations in stage_rows.items()
+    ]).sort_values("Total (s)", ascending=False)
+    st.dataframe(breakdown_df, hide_index=True, use_container_width=True)
+
 
 def analytics_page():
     # Custom CSS for professional styling and consistent layout
@@ -34,66 +108,66 @@ def analytics_page():
         </style>
         """, unsafe_allow_html=True)
 
-    # --- Data Persistence Functions ---
-    def save_session_data():
-        """Save session state data to a JSON file for persistence."""
-        try:
-            data = {
-                "chatbot_queries": st.session_state.chatbot_queries,
-                "code_prompts": st.session_state.code_prompts,
-                "total_chatbot_time": st.session_state.total_chatbot_time,
-                "total_code_time": st.session_state.total_code_time,
-                "response_times": st.session_state.response_times
-            }
-            with open("session_data.json", "w") as f:
-                json.dump(data, f)
-            st.success("Session data saved successfully!")
-        except Exception as e:
-            st.error(f"Error saving session data: {e}")
-
-    def load_session_data():
-        """Load session state data from a JSON file if it exists."""
-        try:
-            if os.path.exists("session_data.json"):
-                with open("session_data.json", "r") as f:
-                    data = json.load(f)
-                    st.session_state.chatbot_queries = data.get("chatbot_queries", 0)
-                    st.session_state.code_prompts = data.get("code_prompts", 0)
-                    st.session_state.total_chatbot_time = data.get("total_chatbot_time", 0.0)
-                    st.session_state.total_code_time = data.get("total_code_time", 0.0)
-                    st.session_state.response_times = data.get("response_times", [])
-                    st.success("Session data loaded successfully!")
-            else:
-                # Initialize session state if no file exists
-                st.session_state.chatbot_queries = 0
-                st.session_state.code_prompts = 0
-                st.session_state.response_times = []
-                st.session_state.total_chatbot_time = 0.0
-                st.session_state.total_code_time = 0.0
-        except Exception as e:
-            st.error(f"Error loading session data: {e}")
-
-    # Load session data at the start
-    load_session_data()
-
     # --- Dashboard Header ---
     st.markdown("<h1>📊 Analytics Dashboard</h1>", unsafe_allow_html=True)
 
+    # --- Resume Analysis Cache ---
+    st.markdown("<h2>Resume Analysis Cache</h2>", unsafe_allow_html=True)
+    cache_stats = get_result_cache().stats()
+    cache_col1, cache_col2, cache_col3, cache_col4 = st.columns(4)
+
+    with cache_col1:
+        st.metric(label="Cache Hits", value=cache_stats["hits"])
+
+    with cache_col2:
+        st.metric(label="Cache Misses", value=cache_stats["misses"])
+
+    with cache_col3:
+        st.metric(label="Hit Rate", value=f"{cache_stats['hit_rate']:.0%}")
+
+    with cache_col4:
+        st.metric(label="Cached Analyses", value=cache_stats["disk_entries"])
+
+    # --- Interview Chatbot Semantic Cache ---
+    st.markdown("<h2>Chatbot Answer Cache</h2>", unsafe_allow_html=True)
+    semantic_stats = get_semantic_cache().stats()
+    semantic_col1, semantic_col2, semantic_col3, semantic_col4 = st.columns(4)
+
+    with semantic_col1:
+        st.metric(label="Cache Hits", value=semantic_stats["hits"])
+
+    with semantic_col2:
+        st.metric(label="Cache Misses", value=semantic_stats["misses"])
+
+    with semantic_col3:
+        st.metric(label="Hit Rate", value=f"{semantic_stats['hit_rate']:.0%}")
+
+    with semantic_col4:
+        st.metric(label="Cached Answers", value=semantic_stats["entries"])
+
     # --- Data for Analytics ---
-    if (st.session_state.chatbot_queries == 0 and 
-        st.session_state.code_prompts == 0 and 
-        st.session_state.total_chatbot_time == 0 and 
-        st.session_state.total_code_time == 0):
+    # Running aggregates: only events recorded since the last render are read from the store
+    snapshot = get_metrics_aggregator().snapshot()
+    totals = snapshot["tasks"]
+    empty_totals = {"count": 0, "total_time": 0.0}
+    chatbot_totals = totals.get(TASK_CREW_CHAT, empty_totals)
+    code_totals = totals.get(TASK_CODE_GENERATION, empty_totals)
+    analysis_totals = totals.get(TASK_GEMINI_ANALYSIS, empty_totals)
+
+    if not totals:
         st.info("No data available for generating charts.")
         return  # Stop rendering further charts if no data exists
 
     data = {
-        "Metrics": ["Chatbot Queries", "Code Prompts", "Chatbot Response Time (Total)", "Code Response Time (Total)"],
+        "Metrics": ["Chatbot Queries", "Code Prompts", "Resume Analyses",
+                    "Chatbot Response Time (Total)", "Code Response Time (Total)", "Analysis Time (Total)"],
         "Values": [
-            st.session_state.chatbot_queries, 
-            st.session_state.code_prompts, 
-            round(st.session_state.total_chatbot_time, 2), 
-            round(st.session_state.total_code_time, 2)
+            chatbot_totals["count"],
+            code_totals["count"],
+            analysis_totals["count"],
+            round(chatbot_totals["total_time"], 2),
+            round(code_totals["total_time"], 2),
+            round(analysis_totals["total_time"], 2)
         ]
     }
 
@@ -115,8 +189,8 @@ def analytics_page():
     # --- Pie Chart: Task Distribution ---
     st.markdown("<h2>Task Distribution</h2>", unsafe_allow_html=True)
     task_distribution_fig = px.pie(
-        values=[st.session_state.chatbot_queries, st.session_state.code_prompts], 
-        names=["Chatbot Queries", "Code Prompts"],
+        values=[chatbot_totals["count"], code_totals["count"], analysis_totals["count"]],
+        names=["Chatbot Queries", "Code Prompts", "Resume Analyses"],
         title="Task Distribution",
         color_discrete_sequence=px.colors.sequential.Teal,
         hole=0.3
@@ -126,10 +200,10 @@ def analytics_page():
 
     # --- Line Chart: Response Times ---
     st.markdown("<h2>Response Times Over Interactions</h2>", unsafe_allow_html=True)
-    if st.session_state.response_times:
+    if snapshot["recent"]:
         response_times_df = pd.DataFrame({
-            "Task": ["Chatbot" if i % 2 == 0 else "Code Generation" for i in range(len(st.session_state.response_times))],
-            "Response Time (sec)": st.session_state.response_times
+            "Task": [TASK_LABELS.get(task, task) for task, _ in snapshot["recent"]],
+            "Response Time (sec)": [duration for _, duration in snapshot["recent"]]
         })
 
         line_chart = px.line(response_times_df, x=response_times_df.index, y="Response Time (sec)", color="Task", 
@@ -144,38 +218,48 @@ def analytics_page():
     else:
         st.info("No response times recorded yet.")
 
+    # --- Latency Percentiles per Task Type ---
+    st.markdown("<h2>Latency Percentiles</h2>", unsafe_allow_html=True)
+
+    def seconds(value):
+        return round(value, 2) if value is not None else None
+
+    percentiles_df = pd.DataFrame([
+        {
+            "Task": TASK_LABELS.get(task, task),
+            "Count": summary["count"],
+            "Mean (s)": seconds(summary["mean"]),
+            "p50 (s)": seconds(summary["p50"]),
+            "p95 (s)": seconds(summary["p95"]),
+            "p99 (s)": seconds(summary["p99"]),
+            "Mean First Token (s)": seconds(summary["mean_time_to_first_token"])
+        }
+        for task, summary in totals.items()
+    ])
+    st.dataframe(percentiles_df, hide_index=True, use_container_width=True)
+
+    # --- Span-level traces of recent requests ---
+    render_traces()
+
     # --- Summary Section for Quick Stats ---
     st.markdown("<h2>Quick Stats</h2>", unsafe_allow_html=True)
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric(label="Chatbot Queries", value=st.session_state.chatbot_queries)
+        st.metric(label="Chatbot Queries", value=chatbot_totals["count"])
 
     with col2:
-        st.metric(label="Code Prompts", value=st.session_state.code_prompts)
+        st.metric(label="Code Prompts", value=code_totals["count"])
 
     with col3:
-        st.metric(label="Chatbot Total Time (s)", value=round(st.session_state.total_chatbot_time, 2))
+        st.metric(label="Chatbot Total Time (s)", value=round(chatbot_totals["total_time"], 2))
 
     with col4:
-        st.metric(label="Code Total Time (s)", value=round(st.session_state.total_code_time, 2))
-
-    # Auto-save session data on button interaction
-    if st.button("Save Session Data"):
-        save_session_data()
+        st.metric(label="Code Total Time (s)", value=round(code_totals["total_time"], 2))
 
-    # Optional: Reset session data to default values
+    # Optional: Reset all recorded metrics
     if st.button("Reset Session Data"):
-        default_data = {
-            "chatbot_queries": 0,
-            "code_prompts": 0,
-            "total_chatbot_time": 0.0,
-            "total_code_time": 0.0,
-            "response_times": []
-        }
-        st.session_state.update(default_data)
-        with open("session_data.json", "w") as f:
-            json.dump(default_data, f)
+        get_metrics_store().reset()
         st.success("Session data reset successfully!")
 
     # Footer Section
@@ -0,0 +1,346 @@
+"""Headless JSON API over the analysis, interview and code-generation pipelines.
+
+Machine clients (e.g. an ATS) call the same cached pipelines as the Streamlit
+app without paying for a script rerun per request:
+
+    python api_server.py --port 8080
+
+    curl -F resume=@resume.pdf -F job_description="..." -F prompt="Percentage Match" \\
+         http://localhost:8080/v1/analyze
+"""
+import sys
+
+try:
+    import pysqlite3
+
+    sys.modules['sqlite3'] = pysqlite3
+except ImportError:
+    pass
+
+import argparse
+import asyncio
+import base64
+import binascii
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import time
+from contextlib import aclosing
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+from batch_analysis import BATCH_RANKING_PROMPT, rank_resumes_async
+from gemini_scheduler import GEMINI_BACKOFF_MAX, GeminiQuotaError
+from http_client import CircuitOpenError, DeadlineExceededError, HttpClientError
+from metrics_store import TASK_CODE_GENERATION, TASK_CREW_CHAT, TASK_GEMINI_ANALYSIS, record_event
+from resume_analysis import analyze_all_prompts_async, analyze_resume_async
+from structured_output import parse_structured_response
+from tracing import current_span, traced
+
+load_dotenv()
+
+# API configuration (overridable through environment variables)
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", 8080))
+API_AUTH_KEY = os.getenv("API_AUTH_KEY")
+API_MAX_UPLOAD_MB = int(os.getenv("API_MAX_UPLOAD_MB", 20))
+API_GEMINI_CONCURRENCY = int(os.getenv("API_GEMINI_CONCURRENCY", 16))
+API_PRELOAD_CREWS = os.getenv("API_PRELOAD_CREWS", "true").lower() == "true"
+
+# Metrics recorded by the API are grouped under this session id
+API_SESSION_ID = "api"
+
+logger = logging.getLogger(__name__)
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def json_error(error_class, message):
+    return error_class(text=json.dumps({"error": message}), content_type="application/json")
+
+
+@web.middleware
+async def auth_middleware(request, handler):
+    """Require the API key (X-API-Key or Bearer token) on every route except /health when API_AUTH_KEY is set."""
+    if API_AUTH_KEY and request.path != "/health":
+        supplied = request.headers.get("X-API-Key", "")
+        authorization = request.headers.get("Authorization", "")
+        if authorization.startswith("Bearer "):
+            supplied = authorization[len("Bearer "):]
+        if not hmac.compare_digest(supplied.encode(), API_AUTH_KEY.encode()):
+            raise json_error(web.HTTPUnauthorized, "Missing or invalid API key")
+    return await handler(request)
+
+
+@web.middleware
+async def error_middleware(request, handler):
+    """Return unexpected failures as JSON 500s instead of aiohttp's plain-text page."""
+    try:
+        return await handler(request)
+    except web.HTTPException:
+        raise
+    except GeminiQuotaError as e:
+        raise web.HTTPTooManyRequests(
+            text=json.dumps({"error": str(e)}), content_type="application/json",
+            headers={"Retry-After": str(int(GEMINI_BACKOFF_MAX))},
+        )
+    except Exception as e:
+        logger.exception("Unhandled error on %s", request.path)
+        raise json_error(web.HTTPInternalServerError, f"{type(e).__name__}: {e}")
+
+
+async def read_json_object(request):
+    try:
+        body = await request.json()
+    except ValueError as e:
+        raise json_error(web.HTTPBadRequest, f"Invalid JSON body: {e}")
+    if not isinstance(body, dict):
+        raise json_error(web.HTTPBadRequest, "The JSON body must be an object")
+    return body
+
+
+async def read_resume_request(request):
+    """Parse (resumes, job_description, prompts) from multipart form data or a JSON body.
+
+    Multipart: one or more `resume` files, `job_description`, and `prompt` fields.
+    JSON: {"resumes": [{"name", "data" (base64)}] or "resume": base64,
+           "job_description": str, "prompts": [str] or "prompt": str}.
+    """
+    if request.content_type.startswith("multipart/"):
+        form = await request.post()
+        resumes = [(field.filename, field.file.read()) for field in form.getall("resume", []) if hasattr(field, "file")]
+        job_description = form.get("job_description", "")
+        prompts = [prompt for prompt in form.getall("prompt", []) if isinstance(prompt, str)]
+    else:
+        body = await read_json_object(request)
+        try:
+            entries = body.get("resumes") or ([{"name": "resume.pdf", "data": body["resume"]}] if "resume" in body else [])
+            resumes = [(entry.get("name", f"resume-{number}.pdf"), base64.b64decode(entry["data"], validate=True))
+                       for number, entry in enumerate(entries, start=1)]
+        except (ValueError, KeyError, TypeError, AttributeError, binascii.Error) as e:
+            raise json_error(web.HTTPBadRequest, f"Invalid JSON body: {e}")
+        job_description = body.get("job_description", "")
+        prompts = body.get("prompts") or ([body["prompt"]] if body.get("prompt") else [])
+        if not isinstance(prompts, list) or not all(isinstance(prompt, str) for prompt in prompts):
+            raise json_error(web.HTTPBadRequest, "prompts must be a list of strings and prompt a string")
+
+    if not isinstance(job_description, str):
+        raise json_error(web.HTTPBadRequest, "job_description must be a string")
+    if not resumes:
+        raise json_error(web.HTTPBadRequest, "Upload at least one resume PDF")
+    if not job_description.strip():
+        raise json_error(web.HTTPBadRequest, "job_description is required")
+    return resumes, job_description, prompts
+
+
+async def health(request):
+    return web.json_response({"status": "ok"})
+
+
+@traced("api.analyze")
+async def analyze(request):
+    """Run one or more prompts against one resume; repeats are served from the shared result cache.
+
+    Scoring prompts are answered as JSON and also returned parsed under "records".
+    """
+    resumes, job_description, prompts = await read_resume_request(request)
+    if len(resumes) != 1:
+        raise json_error(web.HTTPBadRequest, "Send exactly one resume; use /v1/rank for several")
+    if not prompts:
+        raise json_error(web.HTTPBadRequest, "At least one prompt is required")
+    _, pdf_bytes = resumes[0]
+
+    start_time = time.perf_counter()
+    if len(prompts) == 1:
+        response = await analyze_resume_async(
+            pdf_bytes, job_description, prompts[0], semaphore=request.app["gemini_semaphore"]
+        )
+        responses = {prompts[0]: response}
+    else:
+        responses = await analyze_all_prompts_async(
+            pdf_bytes, job_description, prompts, semaphore=request.app["gemini_semaphore"]
+        )
+    duration = round(time.perf_counter() - start_time, 2)
+
+    record_event(TASK_GEMINI_ANALYSIS, duration, session_id=API_SESSION_ID, mode="api", prompts=len(prompts))
+    # Parsed records (score, keywords, red flags) for the prompts answered as structured JSON
+    records = {prompt: parse_structured_response(prompt, response) for prompt, response in responses.items()}
+    return web.json_response({
+        "responses": responses,
+        "records": {prompt: record for prompt, record in records.items() if record is not None},
+        "duration": duration,
+    })
+
+
+@traced("api.rank")
+async def rank(request):
+    """Score and rank several resumes against one job description."""
+    resumes, job_description, prompts = await read_resume_request(request)
+    prompt = prompts[0] if prompts else BATCH_RANKING_PROMPT
+
+    start_time = time.perf_counter()
+    results = await rank_resumes_async(resumes, job_description, prompt, semaphore=request.app["gemini_semaphore"])
+    duration = round(time.perf_counter() - start_time, 2)
+
+    record_event(TASK_GEMINI_ANALYSIS, duration, session_id=API_SESSION_ID, mode="api_batch",
+                 prompt=prompt, resumes=len(resumes))
+    return web.json_response({"prompt": prompt, "results": results, "duration": duration})
+
+
+async def read_json(request, *required):
+    """Return the JSON object body, requiring each of `required` to be a non-empty string."""
+    body = await read_json_object(request)
+    missing = [field for field in required if field not in body or not str(body[field]).strip()]
+    if missing:
+        raise json_error(web.HTTPBadRequest, f"Missing fields: {', '.join(missing)}")
+    not_strings = [field for field in required if not isinstance(body[field], str)]
+    if not_strings:
+        raise json_error(web.HTTPBadRequest, f"Fields must be strings: {', '.join(not_strings)}")
+    return body
+
+
+@traced("api.interview")
+async def interview(request):
+    """Answer an interview question with the topic's crew (or the semantic answer cache)."""
+    body = await read_json(request, "topic", "question")
+    from crew_registry import TOPICS, CrewUnavailableError
+    from interview import answer_question_async
+
+    if body["topic"] not in TOPICS:
+        raise json_error(web.HTTPBadRequest, f"Unknown topic; choose one of {', '.join(TOPICS)}")
+
+    start_time = time.perf_counter()
+    try:
+        answer, cache_hit = await answer_question_async(body["topic"], body["question"])
+    except CrewUnavailableError as e:
+        raise json_error(web.HTTPServiceUnavailable, str(e))
+    duration = round(time.perf_counter() - start_time, 2)
+
+    record_event(TASK_CREW_CHAT, duration, session_id=API_SESSION_ID, topic=body["topic"], cache_hit=cache_hit)
+    return web.json_response({"answer": answer, "cache_hit": cache_hit, "duration": duration})
+
+
+@traced("api.code")
+async def code(request):
+    """Generate code with LinguaLogic; pass back the returned `context` to continue a conversation.
+
+    With "stream": true the response is NDJSON: {"token": ...} lines, then
+    {"done": true, "context": [...]}.
+    """
+    body = await read_json(request, "language", "prompt")
+    from programming import ollama_client, url
+
+    language = body["language"]
+    stream = bool(body.get("stream"))
+    data = {"model": "LinguaLogic", "prompt": f"Language: {language}\n{body['prompt']}", "stream": stream}
+    if body.get("context"):
+        data["context"] = body["context"]
+    current_span().set(language=language, streamed=stream)
+
+    start_time = time.perf_counter()
+    if not stream:
+        try:
+            result = await ollama_client.post_json(url, data)
+        except CircuitOpenError:
+            raise json_error(web.HTTPServiceUnavailable, "The code generation service is unavailable right now")
+        except DeadlineExceededError as e:
+            raise json_error(web.HTTPGatewayTimeout, str(e))
+        except (HttpClientError, ValueError) as e:
+            raise json_error(web.HTTPBadGateway, str(e))
+        if result.get("error"):
+            raise json_error(web.HTTPBadGateway, f"Generation failed: {result['error']}")
+        duration = round(time.perf_counter() - start_time, 2)
+        record_event(TASK_CODE_GENERATION, duration, session_id=API_SESSION_ID, language=language)
+        return web.json_response({"code": result.get("response", ""), "context": result.get("context"),
+                                  "duration": duration})
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    time_to_first_token = None
+    completed = False
+    try:
+        final_message = {}
+        async with aclosing(ollama_client.stream_json_lines(url, data)) as messages:
+            async for message in messages:
+                if message.get("error"):
+                    raise HttpClientError(f"Generation failed: {message['error']}")
+                if message.get("response"):
+                    if time_to_first_token is None:
+                        time_to_first_token = round(time.perf_counter() - start_time, 2)
+                    await response.write((json.dumps({"token": message["response"]}) + "\n").encode())
+                if message.get("done"):
+                    final_message = message
+                    break
+        await response.write((json.dumps({"done": True, "context": final_message.get("context")}) + "\n").encode())
+        completed = True
+    except (HttpClientError, ValueError) as e:
+        # Headers are already sent, so the error is reported in-band
+        await response.write((json.dumps({"error": str(e)}) + "\n").encode())
+    finally:
+        record_event(TASK_CODE_GENERATION, round(time.perf_counter() - start_time, 2), session_id=API_SESSION_ID,
+                     time_to_first_token=time_to_first_token, language=language, streamed=True, completed=completed)
+    await response.write_eof()
+    return response
+
+
+def _preload_crews():
+    try:
+        from crew_registry import warm_crews_in_background
+
+        warm_crews_in_background()
+    except Exception:
+        logger.exception("Could not preload the interview crews; they will load on the first request")
+
+
+async def on_startup(app):
+    app["gemini_semaphore"] = asyncio.Semaphore(API_GEMINI_CONCURRENCY)
+    if API_PRELOAD_CREWS:
+        # crewai is slow to import; load it off the event loop while the API already serves requests
+        asyncio.get_running_loop().run_in_executor(None, _preload_crews)
+
+
+async def on_cleanup(app):
+    if "programming" in sys.modules:
+        await sys.modules["programming"].ollama_client.close()
+
+
+def create_app():
+    app = web.Application(
+        middlewares=[error_middleware, auth_middleware],
+        client_max_size=API_MAX_UPLOAD_MB * 1024 * 1024,
+    )
+    app.router.add_get("/health", health)
+    app.router.add_post("/v1/analyze", analyze)
+    app.router.add_post("/v1/rank", rank)
+    app.router.add_post("/v1/interview", interview)
+    app.router.add_post("/v1/code", code)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the resume analysis, interview and code-generation APIs.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+    if not API_AUTH_KEY and not is_loopback(args.host):
+        parser.error(f"refusing to serve on {args.host} without authentication; set API_AUTH_KEY "
+                     "or bind a loopback address")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
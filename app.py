@@ -4,21 +4,22 @@ import pysqlite3
 sys.modules['sqlite3'] = pysqlite3
 
 import streamlit as st
-from chatbot import chatBot
-from Analytics import analytics_page
 from streamlit_option_menu import option_menu
 from dotenv import load_dotenv
 import base64
-import json
 import os
-import io
-from PIL import Image
 from pathlib import Path
-import pdf2image
-import google.generativeai as genai
 import time
-import asyncio
 import logging
+from resume_analysis import analyze_all_prompts_async, analyze_resume_async
+from batch_analysis import BATCH_RANKING_PROMPT, has_keywords, rank_resumes_async
+from gemini_scheduler import GeminiQuotaError
+from structured_output import response_markdown
+from runtime import dispatch_to_caller, get_session_id, run_async
+from metrics_store import TASK_GEMINI_ANALYSIS, record_event
+from page_loader import load_page, preload_pages_in_background
+from preprocessing import PdfPreprocessor
+from tracing import span, traced
 
 # Set page configuration with a page icon loaded from a file or fallback to an emoji
 page_icon_path = Path("Images/Icon.webp")
@@ -42,13 +43,20 @@ session_state_defaults = {
     'search_history': [],
     'resume_count': 0,
     'total_analysis_time': 0,
-    'chatbot_queries': 0
+    'chatbot_queries': 0,
+    'batch_results': None,
+    'all_responses': {},
+    'generation_timings': None
 }
 
 for key, default in session_state_defaults.items():
     if key not in st.session_state:
         st.session_state[key] = default
 
+# Uploaded resumes are converted once per session, in the background
+if 'pdf_preprocessor' not in st.session_state:
+    st.session_state.pdf_preprocessor = PdfPreprocessor()
+
 # Load environment variables
 load_dotenv()
 
@@ -82,49 +90,38 @@ def load_external_css(file_name):
     except FileNotFoundError:
         st.error(f"CSS file not found: {file_name}")
 
-def input_pdf_setup(uploaded_file):
-    """Convert an uploaded PDF file to an image format for processing."""
-    if uploaded_file is not None:
-        images = pdf2image.convert_from_bytes(uploaded_file.read())
-        first_page = images[0]
-        img_byte_arr = io.BytesIO()
-        first_page.save(img_byte_arr, format='JPEG')
-        img_byte_arr = img_byte_arr.getvalue()
-        pdf_parts = [
-            {
-                "mime_type": "image/jpeg",
-                "data": base64.b64encode(img_byte_arr).decode()
-            }
-        ]
-        return pdf_parts
-    else:
-        raise FileNotFoundError("No file uploaded")
-
-async def get_gemini_response_async(input_text, pdf_content, prompt):
-    """Get a response from the Google Gemini AI model asynchronously."""
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = await asyncio.to_thread(model.generate_content, [input_text, pdf_content[0], prompt])
-        return response.candidates[0].content.parts[0].text
-    except (KeyError, IndexError, AttributeError) as e:
-        st.error(f"Error generating response: {e}")
-        return "No text generated"
-
-async def handle_submission(uploaded_file, input_text, input_prompt):
-    """Handle the submission process for analyzing resumes asynchronously."""
+@traced("resume.analysis", mode="single")
+def handle_submission(uploaded_file, input_text, input_prompt, stream=False):
+    """Handle the submission process for analyzing a resume on the shared event loop."""
     if uploaded_file is not None:
         if not input_text:
             st.warning("Please provide a job description for analysis.")
             return
         try:
-            pdf_content = input_pdf_setup(uploaded_file)
             progress_bar = st.progress(0)
+            stream_placeholder = st.empty()
             analysis_time_start = time.time()
-
-            # Awaiting task directly (no need for asyncio.run inside an async function)
-            response = await get_gemini_response_async(input_text, pdf_content, input_prompt)
-
-            st.session_state.response = response  # Store the response in session state
+            first_chunk_time = None
+
+            def show_chunk(text_so_far):
+                nonlocal first_chunk_time
+                if first_chunk_time is None:
+                    first_chunk_time = time.time()
+                stream_placeholder.markdown(text_so_far)
+
+            with span("upload.read") as current:
+                pdf_bytes = uploaded_file.getvalue()
+                current.set(bytes=len(pdf_bytes))
+
+            # Repeat analyses of the same resume, job description and prompt are served from the cache
+            response = run_async(analyze_resume_async(
+                pdf_bytes, input_text, input_prompt,
+                on_chunk=dispatch_to_caller(show_chunk) if stream else None,
+                converted=st.session_state.pdf_preprocessor.submit(pdf_bytes)
+            ))
+            stream_placeholder.empty()
+
+            st.session_state.response = response_markdown(input_prompt, response)  # Store the response in session state
             st.session_state.message = ('success', "Resume analyzed successfully!")
             st.session_state.message_time = time.time()
 
@@ -134,14 +131,28 @@ async def handle_submission(uploaded_file, input_text, input_prompt):
             # Track total time spent and resume count
             analysis_time_end = time.time()
             st.session_state.total_analysis_time += (analysis_time_end - analysis_time_start)
+
+            # Record perceived latency (first streamed token) separately from total generation time
+            st.session_state.generation_timings = {
+                "time_to_first_token": round(first_chunk_time - analysis_time_start, 2) if first_chunk_time else None,
+                "total_time": round(analysis_time_end - analysis_time_start, 2)
+            }
             st.session_state.resume_count += 1
 
             # Update chatbot queries count
             st.session_state.chatbot_queries += 1
 
-            # Save updated session state to file
-            save_session_data()
+            # Append the interaction to the shared metrics store
+            timings = st.session_state.generation_timings
+            record_event(
+                TASK_GEMINI_ANALYSIS, timings["total_time"], session_id=get_session_id(),
+                time_to_first_token=timings["time_to_first_token"], prompt=input_prompt, mode="single"
+            )
 
+        except GeminiQuotaError as e:
+            st.session_state.response = None
+            st.session_state.message = ('warning', str(e))
+            st.session_state.message_time = time.time()
         except Exception as e:
             st.session_state.response = None
             st.session_state.message = ('error', f"An error occurred: {e}")
@@ -151,29 +162,168 @@ async def handle_submission(uploaded_file, input_text, input_prompt):
         st.session_state.message = ('warning', "Please upload the resume")
         st.session_state.message_time = time.time()
 
-def save_session_data():
-    """Save session state data to a JSON file for persistence."""
-    try:
-        data = {
-            "chatbot_queries": st.session_state.get('chatbot_queries', 0),
-            "code_prompts": st.session_state.get('code_prompts', 0),
-            "total_chatbot_time": st.session_state.get('total_chatbot_time', 0.0),
-            "total_code_time": st.session_state.get('total_code_time', 0.0),
-            "response_times": st.session_state.get('response_times', [])
-        }
-        with open("session_data.json", "w") as f:
-            json.dump(data, f)
-    except Exception as e:
-        st.error(f"Error saving session data: {e}")
-
 def create_button_grid(layout, uploaded_file, input_text):
     """Dynamically create a grid of buttons based on the provided layout."""
+    clicked_label = None
     for row_layout in layout:
         cols = st.columns(len(row_layout))
         for col, label in zip(cols, row_layout):
             with col:
                 if st.button(label):
-                    asyncio.run(handle_submission(uploaded_file, input_text, label))
+                    clicked_label = label
+
+    # Run the analysis below the grid so streamed output uses the full page width
+    stream = st.checkbox("Stream responses as they are generated", value=True, key="stream_responses")
+    if clicked_label:
+        handle_submission(uploaded_file, input_text, clicked_label, stream=stream)
+
+@traced("resume.analysis", mode="batch")
+def handle_batch_submission(uploaded_files, input_text, input_prompt):
+    """Rank many resumes against one job description, updating a live table as results arrive."""
+    import pandas as pd  # Imported on first use to keep it off the Home page's cold start
+
+    if not uploaded_files:
+        st.warning("Please upload the resumes to rank.")
+        return
+    if not input_text:
+        st.warning("Please provide a job description for analysis.")
+        return
+
+    named_pdfs = [(uploaded.name, uploaded.getvalue()) for uploaded in uploaded_files]
+    progress_bar = st.progress(0)
+    table_placeholder = st.empty()
+
+    def show_partial_results(ranked):
+        progress_bar.progress(len(ranked) / len(named_pdfs))
+        table_placeholder.dataframe(pd.DataFrame(ranked)[["Candidate", "Score", "Status"]], use_container_width=True)
+
+    analysis_time_start = time.time()
+    st.session_state.batch_results = run_async(rank_resumes_async(
+        named_pdfs, input_text, input_prompt, on_result=dispatch_to_caller(show_partial_results)
+    ))
+    analysis_time = time.time() - analysis_time_start
+    st.session_state.total_analysis_time += analysis_time
+    st.session_state.resume_count += len(named_pdfs)
+    record_event(
+        TASK_GEMINI_ANALYSIS, round(analysis_time, 2), session_id=get_session_id(),
+        prompt=input_prompt, mode="batch", resumes=len(named_pdfs)
+    )
+    table_placeholder.empty()
+    progress_bar.empty()
+
+def display_batch_results():
+    """Show the ranked batch table with per-candidate analyses and a CSV export."""
+    if not st.session_state.batch_results:
+        return
+    import pandas as pd
+
+    results = st.session_state.batch_results
+    results_df = pd.DataFrame(results)
+    st.subheader("Ranked Candidates")
+
+    # Scores and keywords come from structured records, so filtering is local and costs no model calls
+    min_score_col, keywords_col = st.columns(2)
+    with min_score_col:
+        min_score = st.slider("Minimum score", 0, 100, 0, key="batch_min_score")
+    with keywords_col:
+        required = st.text_input("Must match keywords (comma separated)", key="batch_required_keywords")
+    required_keywords = [keyword for keyword in required.split(",") if keyword.strip()]
+    visible = [
+        row for row in results
+        if (min_score == 0 or (row["Score"] or 0) >= min_score) and has_keywords(row, required_keywords)
+    ]
+
+    st.dataframe(
+        pd.DataFrame(visible, columns=results_df.columns)[["Candidate", "Score", "Status", "Missing Keywords", "Red Flags"]],
+        use_container_width=True
+    )
+    st.caption(f"Showing {len(visible)} of {len(results)} candidates")
+    for row in visible:
+        with st.expander(f"{row['Candidate']} — {row['Score'] if row['Score'] is not None else 'N/A'}"):
+            st.write(row["Analysis"] or row["Status"])
+    st.download_button(
+        label="Download Ranking as CSV",
+        data=results_df.to_csv(index=False).encode(),
+        file_name="candidate_ranking.csv",
+        mime="text/csv"
+    )
+
+def build_report(responses):
+    """Combine the responses of several prompts into one Markdown report."""
+    sections = [f"## {label}\n\n{response}" for label, response in responses.items()]
+    return "# Resume Analysis Report\n\n" + "\n\n".join(sections)
+
+def export_report(responses):
+    """Allow the user to export every prompt's response as a single report."""
+    st.download_button(
+        label="Download Full Report",
+        data=build_report(responses).encode(),
+        file_name="resume_analysis_report.md",
+        mime="text/markdown"
+    )
+
+@traced("resume.analysis", mode="run_all")
+def handle_run_all(uploaded_file, input_text, prompts):
+    """Run every prompt for the selected role concurrently, rendering each section as it lands."""
+    if uploaded_file is None:
+        st.warning("Please upload the resume")
+        return
+    if not input_text:
+        st.warning("Please provide a job description for analysis.")
+        return
+
+    st.subheader("Full Analysis")
+    placeholders = {label: st.empty() for label in prompts}
+    for label, placeholder in placeholders.items():
+        placeholder.info(f"{label}: waiting for response...")
+
+    def show_section(label, response):
+        with placeholders[label].container():
+            st.markdown(f"### {label}")
+            st.write(response_markdown(label, response))
+
+    analysis_time_start = time.time()
+    try:
+        pdf_bytes = uploaded_file.getvalue()
+        responses = run_async(analyze_all_prompts_async(
+            pdf_bytes, input_text, prompts, on_result=dispatch_to_caller(show_section),
+            converted=st.session_state.pdf_preprocessor.submit(pdf_bytes)
+        ))
+    except GeminiQuotaError as e:
+        st.warning(str(e))
+        return
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
+        return
+
+    analysis_time = time.time() - analysis_time_start
+    responses = {label: response_markdown(label, response) for label, response in responses.items()}
+    st.session_state.all_responses = responses
+    st.session_state.total_analysis_time += analysis_time
+    st.session_state.resume_count += 1
+    record_event(
+        TASK_GEMINI_ANALYSIS, round(analysis_time, 2), session_id=get_session_id(),
+        mode="run_all", prompts=len(prompts)
+    )
+    export_report(responses)
+
+def display_all_responses(prompts):
+    """Show the stored Run All results for the prompts of the selected role."""
+    responses = {label: st.session_state.all_responses[label] for label in prompts if label in st.session_state.all_responses}
+    if not responses:
+        return
+    st.subheader("Full Analysis")
+    for label, response in responses.items():
+        st.markdown(f"### {label}")
+        st.write(response)
+    export_report(responses)
+
+def create_run_all_section(prompts, uploaded_file, input_text):
+    """Offer a single action that runs all of the role's prompts at once."""
+    if st.button("Run All Prompts"):
+        handle_run_all(uploaded_file, input_text, prompts)
+    else:
+        display_all_responses(prompts)
 
 def export_result_as_text():
     """Allow the user to export the analysis result as a text file."""
@@ -229,8 +379,6 @@ with st.sidebar:
 if selected == "Home":
     st.markdown('<a name="home"></a>', unsafe_allow_html=True)
 
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
     # Typed.js integration for the typing animation on the Home page
     typing_animation = """
     <style>
@@ -281,6 +429,8 @@ if selected == "Home":
     if uploaded_file is not None:
         st.session_state.message = ('success', "PDF Uploaded Successfully")
         st.session_state.message_time = time.time()
+        # Start converting now so the first prompt click does not wait for rasterization
+        st.session_state.pdf_preprocessor.submit(uploaded_file.getvalue())
 
     # Prompts Definitions for Recruiters and Job Seekers
     recruiter_prompts = [
@@ -317,6 +467,20 @@ if selected == "Home":
             recruiter_prompts[3:]
         ]
         create_button_grid(layout, uploaded_file, input_text)
+        create_run_all_section(recruiter_prompts, uploaded_file, input_text)
+
+        # Batch mode: rank many resumes against the same job description concurrently
+        st.subheader("Batch Candidate Ranking")
+        batch_files = st.file_uploader(
+            "Upload resumes to rank (PDF)...", type=["pdf"], accept_multiple_files=True, key="batch_resumes"
+        )
+        batch_prompt = st.selectbox(
+            "Score candidates with", recruiter_prompts + [BATCH_RANKING_PROMPT],
+            index=len(recruiter_prompts), key="batch_prompt"
+        )
+        if st.button("Rank Candidates"):
+            handle_batch_submission(batch_files, input_text, batch_prompt)
+        display_batch_results()
 
     elif user_type == "Job Seeker":
         st.subheader("Job Seeker Prompts")
@@ -328,6 +492,7 @@ if selected == "Home":
             ["Resume Length Optimization", "Job Fit Score", "Cover Letter Generation", "Career Growth Potential"]
         ]
         create_button_grid(layout, uploaded_file, input_text)
+        create_run_all_section([label for row in layout for label in row], uploaded_file, input_text)
 
     else:
         st.info("Please select Role to view the Suggestions.")
@@ -336,6 +501,11 @@ if selected == "Home":
     if st.session_state.response:
         st.subheader("The Response is")
         st.write(st.session_state.response)
+
+        timings = st.session_state.generation_timings
+        if timings:
+            first_token = f"{timings['time_to_first_token']}s" if timings['time_to_first_token'] is not None else "n/a"
+            st.caption(f"First token: {first_token} · Total: {timings['total_time']}s")
         
         # Provide option to download the response as a text file
         export_result_as_text()
@@ -359,11 +529,11 @@ if selected == "Home":
 
 # Analytics Page
 elif selected == "Analytics":
-    analytics_page()
+    load_page("Analytics")()
 
 # chatBot Page
 elif selected == "chatBot":
-    chatBot()
+    load_page("chatBot")()
 
 # Contact Page
 elif selected == "Contact":
@@ -431,3 +601,6 @@ query_params = st.query_params  # Access the query parameters directly
 if query_params.get("form_submitted", ["false"])[0] == "true":
     st.session_state["form_submitted"] = True
     st.experimental_set_query_params(form_submitted="false")
+
+# Import the other pages' modules in the background now that this page has rendered
+preload_pages_in_background()
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from gemini_scheduler import PRIORITY_BATCH
+from resume_analysis import analyze_resume_async
+from structured_output import parse_structured_response, response_markdown
+
+# Batch configuration (overridable through environment variables)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+BATCH_CONVERSION_WORKERS = int(os.getenv("BATCH_CONVERSION_WORKERS", min(8, os.cpu_count() or 1)))
+
+# Prompt used to score candidates when ranking a batch
+BATCH_RANKING_PROMPT = "Percentage Match"
+
+_PERCENTAGE_PATTERN = re.compile(r"(\d{1,3}(?:\.\d+)?)\s*%")
+
+
+def extract_match_score(response):
+    """Pull the first percentage out of a free-form response, or None if there is none."""
+    match = _PERCENTAGE_PATTERN.search(response or "")
+    if match is None:
+        return None
+    score = float(match.group(1))
+    return score if 0 <= score <= 100 else None
+
+
+def result_row(name, prompt, response):
+    """One ranking row; structured answers supply the score and keyword columns without any text parsing."""
+    record = parse_structured_response(prompt, response)
+    if record is None:
+        score, matched, missing, red_flags = extract_match_score(response), [], [], []
+    else:
+        score, matched, missing, red_flags = (
+            record["score"], record["matched_keywords"], record["missing_keywords"], record["red_flags"]
+        )
+    return {
+        "Candidate": name,
+        "Score": score,
+        "Status": "Done",
+        "Matched Keywords": ", ".join(matched),
+        "Missing Keywords": ", ".join(missing),
+        "Red Flags": ", ".join(red_flags),
+        "Analysis": response_markdown(prompt, response),
+    }
+
+
+def error_row(name, error):
+    return {"Candidate": name, "Score": None, "Status": f"Error: {error}", "Matched Keywords": "",
+            "Missing Keywords": "", "Red Flags": "", "Analysis": ""}
+
+
+def has_keywords(row, keywords):
+    """True when every keyword is one of the row's matched keywords (whole keywords, case-insensitive)."""
+    matched = {keyword.strip().lower() for keyword in row["Matched Keywords"].split(",")}
+    return all(keyword.strip().lower() in matched for keyword in keywords)
+
+
+def rank_results(results):
+    """Sort batch results by score, best first, with unscored candidates last."""
+    return sorted(results, key=lambda row: (row["Score"] is None, -(row["Score"] or 0), row["Candidate"]))
+
+
+async def rank_resumes_async(named_pdfs, input_text, prompt=BATCH_RANKING_PROMPT,
+                             concurrency=BATCH_CONCURRENCY, on_result=None, semaphore=None):
+    """Analyze many resumes against one job description and return them ranked.
+
+    named_pdfs is a list of (name, pdf_bytes). PDFs are converted on a worker
+    pool while at most `concurrency` Gemini calls are in flight, or as many as
+    a shared `semaphore` allows when one is passed. on_result, if given, is
+    called with the ranked results so far each time one completes.
+    """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def analyze_one(name, pdf_bytes):
+        try:
+            response = await analyze_resume_async(
+                pdf_bytes, input_text, prompt, executor=executor, semaphore=semaphore, priority=PRIORITY_BATCH
+            )
+            return result_row(name, prompt, response)
+        except Exception as e:
+            return error_row(name, e)
+
+    with ThreadPoolExecutor(max_workers=BATCH_CONVERSION_WORKERS) as executor:
+        tasks = [asyncio.create_task(analyze_one(name, pdf_bytes)) for name, pdf_bytes in named_pdfs]
+        for finished in asyncio.as_completed(tasks):
+            results.append(await finished)
+            if on_result is not None:
+                on_result(rank_results(results))
+
+    return rank_results(results)
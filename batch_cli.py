@@ -0,0 +1,280 @@
+"""Resumable command-line screening of a folder of resumes.
+
+Every PDF in a directory is analyzed against one job description with one or
+more prompt labels, outside the Streamlit UI:
+
+    python batch_cli.py resumes/ --job-description jd.txt \\
+        --prompt "Percentage Match" --prompt "Job Fit Score" --output results.jsonl
+
+Results are appended to the JSONL output as they land, one line per
+(resume, prompt); scoring prompts also carry their parsed "record" (score,
+matched and missing keywords, red flags) for sorting and filtering with jq.
+The output doubles as the checkpoint: rerunning the same command skips every
+pair already answered for this job description, model and schema version and
+only retries failures, so a crashed run never repeats paid calls.
+"""
+import sys
+
+try:
+    import pysqlite3
+
+    sys.modules['sqlite3'] = pysqlite3
+except ImportError:
+    pass
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from batch_analysis import BATCH_CONCURRENCY, BATCH_CONVERSION_WORKERS, BATCH_RANKING_PROMPT
+from gemini_scheduler import PRIORITY_BATCH
+from metrics_store import TASK_GEMINI_ANALYSIS, record_event
+from pdf_processing import input_pdf_setup
+from result_cache import get_result_cache, normalize_job_description
+from resume_analysis import (
+    GEMINI_MODEL_NAME, NO_TEXT_GENERATED, analysis_cache_key, get_gemini_response_async, is_cacheable
+)
+from structured_output import SCHEMA_VERSION, is_structured, parse_structured_response
+from tracing import span, trace
+
+load_dotenv()
+
+# Metrics recorded by the CLI are grouped under this session id
+CLI_SESSION_ID = "batch-cli"
+
+# Log progress every this many resumes
+PROGRESS_EVERY = 25
+
+logger = logging.getLogger(__name__)
+
+
+def find_resumes(directory, recursive=False):
+    """Return the PDFs under directory, sorted so reruns visit them in the same order."""
+    pattern = "**/*" if recursive else "*"
+    return sorted(path for path in Path(directory).glob(pattern) if path.is_file() and path.suffix.lower() == ".pdf")
+
+
+def job_description_digest(job_description):
+    return hashlib.sha256(normalize_job_description(job_description).encode("utf-8")).hexdigest()
+
+
+def load_checkpoint(output_path, job_digest, model=GEMINI_MODEL_NAME, schema_version=SCHEMA_VERSION):
+    """Return the (resume sha256, prompt) pairs already answered for this job description.
+
+    Answers from another model or response schema version are answered again,
+    as is a truncated last line from a crashed run.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if (record.get("job_sha256") == job_digest and record.get("status") == "ok"
+                    and record.get("model") == model and record.get("schema_version") == schema_version):
+                done.add((record["sha256"], record["prompt"]))
+    return done
+
+
+class ResultWriter:
+    """Appends one JSON line per result and syncs it to disk before the next one."""
+
+    def __init__(self, path):
+        # Terminate a line cut short by a crash so the next record starts on its own line
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._file = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def convert_resume(pdf_bytes):
+    """Process-pool entry point: turn PDF bytes into Gemini parts."""
+    return input_pdf_setup(io.BytesIO(pdf_bytes))
+
+
+class BatchRun:
+    """Screens resumes with PDF conversion on a process pool and bounded concurrent Gemini calls."""
+
+    def __init__(self, job_description, prompts, writer, done, executor, concurrency):
+        self.job_description = job_description
+        self.job_digest = job_description_digest(job_description)
+        self.prompts = prompts
+        self.writer = writer
+        self.done = done
+        self.executor = executor
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.result_cache = get_result_cache()
+        self.counts = {"answered": 0, "cached": 0, "skipped": 0, "failed": 0}
+
+    def _write(self, name, digest, prompt, response=None, error=None, cached=False, duration=0.0):
+        record = parse_structured_response(prompt, response)
+        if error is None and response != NO_TEXT_GENERATED and is_structured(prompt) and record is None:
+            error = "Response did not match the prompt's JSON schema"
+        failed = error is not None or response == NO_TEXT_GENERATED
+        self.writer.write({
+            "resume": name,
+            "sha256": digest,
+            "job_sha256": self.job_digest,
+            "prompt": prompt,
+            "status": "error" if failed else "ok",
+            "response": None if failed else response,
+            "record": record,
+            "error": error or (NO_TEXT_GENERATED if failed else None),
+            "cached": cached,
+            "duration": round(duration, 2),
+            "model": GEMINI_MODEL_NAME,
+            "schema_version": SCHEMA_VERSION,
+            "timestamp": time.time(),
+        })
+        self.counts["failed" if failed else "cached" if cached else "answered"] += 1
+
+    async def process_resume(self, path, name):
+        with trace("batch.resume", resume=name):
+            pdf_bytes = await asyncio.to_thread(path.read_bytes)
+            digest = hashlib.sha256(pdf_bytes).hexdigest()
+            pending = []
+            for prompt in self.prompts:
+                if (digest, prompt) in self.done:
+                    self.counts["skipped"] += 1
+                    continue
+                cache_key = analysis_cache_key(pdf_bytes, self.job_description, prompt)
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    self._write(name, digest, prompt, cached, cached=True)
+                else:
+                    pending.append((prompt, cache_key))
+            if not pending:
+                return
+
+            start_time = time.perf_counter()
+            try:
+                with span("pdf.convert", bytes=len(pdf_bytes)):
+                    loop = asyncio.get_running_loop()
+                    pdf_content = await loop.run_in_executor(self.executor, convert_resume, pdf_bytes)
+            except Exception as e:
+                for prompt, _ in pending:
+                    self._write(name, digest, prompt, error=f"PDF conversion failed: {e}")
+                return
+
+            await asyncio.gather(*(
+                self._answer(name, digest, prompt, cache_key, pdf_content) for prompt, cache_key in pending
+            ))
+            record_event(TASK_GEMINI_ANALYSIS, round(time.perf_counter() - start_time, 2), session_id=CLI_SESSION_ID,
+                         mode="cli", prompts=len(pending))
+
+    async def _answer(self, name, digest, prompt, cache_key, pdf_content):
+        start_time = time.perf_counter()
+        try:
+            with span("gemini.queue_wait"):
+                await self.semaphore.acquire()
+            try:
+                with span("gemini.generate", model=GEMINI_MODEL_NAME, prompt=prompt):
+                    response = await get_gemini_response_async(
+                        self.job_description, pdf_content, prompt, PRIORITY_BATCH
+                    )
+            finally:
+                self.semaphore.release()
+        except Exception as e:
+            self._write(name, digest, prompt, error=f"{type(e).__name__}: {e}", duration=time.perf_counter() - start_time)
+            return
+        if is_cacheable(prompt, response):
+            self.result_cache.set(cache_key, response)
+        self._write(name, digest, prompt, response, duration=time.perf_counter() - start_time)
+
+
+async def run_batch(resumes, root, run, max_in_flight):
+    """Process resumes with at most max_in_flight of them (and their converted pages) in memory."""
+    slots = asyncio.Semaphore(max_in_flight)
+    start_time = time.perf_counter()
+    tasks = set()
+
+    async def process(path):
+        try:
+            await run.process_resume(path, str(path.relative_to(root)))
+        except Exception:
+            logger.exception("Unexpected failure on %s", path)
+        finally:
+            slots.release()
+
+    for number, path in enumerate(resumes, start=1):
+        await slots.acquire()
+        task = asyncio.create_task(process(path))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        if number % PROGRESS_EVERY == 0:
+            logger.info("%d/%d resumes started, %s (%.1fs)", number, len(resumes), run.counts,
+                        time.perf_counter() - start_time)
+    await asyncio.gather(*tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen a folder of resume PDFs against a job description.")
+    parser.add_argument("directory", help="folder containing the resume PDFs")
+    parser.add_argument("--job-description", required=True, help="text file with the job description")
+    parser.add_argument("--prompt", action="append", dest="prompts",
+                        help=f"prompt label to run on every resume; repeatable (default: {BATCH_RANKING_PROMPT})")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="concurrent Gemini calls")
+    parser.add_argument("--workers", type=int, default=BATCH_CONVERSION_WORKERS, help="PDF conversion processes")
+    parser.add_argument("--recursive", action="store_true", help="include PDFs in subfolders")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    with open(args.job_description, encoding="utf-8") as f:
+        job_description = f.read()
+    if not job_description.strip():
+        parser.error("the job description file is empty")
+    prompts = list(dict.fromkeys(args.prompts or [BATCH_RANKING_PROMPT]))
+    resumes = find_resumes(args.directory, recursive=args.recursive)
+    if not resumes:
+        parser.error(f"no PDFs found in {args.directory}")
+
+    done = load_checkpoint(args.output, job_description_digest(job_description))
+    logger.info("%d resumes x %d prompts; %d pairs already answered in %s",
+                len(resumes), len(prompts), len(done), args.output)
+
+    start_time = time.perf_counter()
+    writer = ResultWriter(args.output)
+    try:
+        # Spawn rather than fork: threads already running here (dispatcher, SQLite) must not be copied mid-lock
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            run = BatchRun(job_description, prompts, writer, done, executor, args.concurrency)
+            asyncio.run(run_batch(resumes, args.directory, run, max_in_flight=args.concurrency + args.workers))
+    finally:
+        writer.close()
+    logger.info("Finished in %.1fs: %s", time.perf_counter() - start_time, run.counts)
+    if run.counts["failed"]:
+        logger.info("Rerun the same command to retry the %d failed pairs", run.counts["failed"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import os
+import zlib
+
+from benchmarks.stub_servers import filler_text
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+
+SAMPLE_JOB_DESCRIPTION = (
+    "We are hiring a senior full-stack engineer with 5+ years of experience in React, TypeScript, "
+    "Node.js and Python. You will design REST and GraphQL APIs, own CI/CD pipelines on AWS, "
+    "mentor junior engineers and work with data scientists on model deployment."
+)
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _build_pdf(page_objects):
+    """Assemble a PDF from per-page (content stream, resources) pairs with a valid xref table."""
+    objects = [None, None]  # 1: catalog, 2: page tree
+    page_ids = []
+    for content, resources in page_objects:
+        extra = []
+        resource_entries = []
+        for name, (kind, obj) in resources.items():
+            extra.append(obj)
+            resource_entries.append((kind, name, len(objects) + len(extra)))
+        content_id = len(objects) + len(extra) + 1
+        page_id = content_id + 1
+        resource_dict = {}
+        for kind, name, obj_id in resource_entries:
+            resource_dict.setdefault(kind, []).append(f"/{name} {obj_id} 0 R")
+        resources_text = " ".join(f"/{kind} << {' '.join(entries)} >>" for kind, entries in resource_dict.items())
+        objects.extend(extra)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << {resources_text} >> /Contents {content_id} 0 R >>".encode("latin-1")
+        )
+        page_ids.append(page_id)
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+
+def make_text_pdf(pages=1, seed=0):
+    """A resume-like PDF with an embedded text layer (served by the text fast path)."""
+    font = ("Font", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_objects = []
+    for page in range(pages):
+        lines = [f"Jane Doe - Senior Software Engineer (page {page + 1})", ""]
+        body = filler_text(2400, seed=f"{seed}-{page}").split()
+        lines.extend(" ".join(body[start:start + 14]) for start in range(0, len(body), 14))
+        text_ops = " ".join(f"({_escape(line)}) '" for line in lines)
+        content = f"BT /F1 10 Tf 14 TL 54 {PAGE_HEIGHT - 54} Td {text_ops} ET".encode("latin-1")
+        page_objects.append((content, {"F1": font}))
+    return _build_pdf(page_objects)
+
+
+def make_scanned_pdf(pages=1, width=1275, height=1650, seed=0):
+    """An image-only PDF, like a scanned resume, that forces the rasterization path."""
+    page_objects = []
+    for page in range(pages):
+        rows = []
+        for y in range(height):
+            # Dark "text lines" on a light background, varied per page
+            dark = (y // 12) % 3 == 0 and 100 < y < height - 100
+            shade = 40 + (y * 7 + page * 13 + seed) % 30 if dark else 245
+            rows.append(bytes([shade]) * width)
+        data = zlib.compress(b"".join(rows))
+        image = (
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceGray "
+            f"/BitsPerComponent 8 /Filter /FlateDecode /Length {len(data)} >>\nstream\n".encode("latin-1")
+            + data + b"\nendstream"
+        )
+        content = f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q".encode("latin-1")
+        page_objects.append((content, {"Im1": ("XObject", image)}))
+    return _build_pdf(page_objects)
+
+
+def make_page_image(width=1275, height=1650, seed=0, color=False):
+    """A rendered resume page (150 DPI letter) with real glyph edges, for image-encoding benchmarks."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    heading = ImageFont.load_default(size=36)
+    body = ImageFont.load_default(size=16)
+    if color:
+        draw.rectangle((0, 0, width, 150), fill=(31, 78, 121))
+        draw.text((80, 50), "Jane Doe - Senior Software Engineer", font=heading, fill="white")
+    else:
+        draw.text((80, 50), "Jane Doe - Senior Software Engineer", font=heading, fill="black")
+    words = filler_text(6000, seed=f"page-{seed}").split()
+    y = 200
+    for start in range(0, len(words), 16):
+        if y > height - 100:
+            break
+        if start % 160 == 0:
+            draw.text((80, y), "Experience" if start == 0 else "Projects", font=heading,
+                      fill=(31, 78, 121) if color else "black")
+            y += 50
+        draw.text((80, y), " ".join(words[start:start + 16]), font=body, fill=(40, 40, 40))
+        y += 24
+    return image
+
+
+def fixture_corpus(extra_dir=None):
+    """Return [(name, kind, pdf_bytes)]: generated text and scanned resumes plus any PDFs in extra_dir."""
+    fixtures = [
+        ("text-1p.pdf", "text", make_text_pdf(pages=1, seed=1)),
+        ("text-3p.pdf", "text", make_text_pdf(pages=3, seed=2)),
+        ("scanned-1p.pdf", "scanned", make_scanned_pdf(pages=1, seed=3)),
+        ("scanned-3p.pdf", "scanned", make_scanned_pdf(pages=3, seed=4)),
+    ]
+    if extra_dir:
+        for name in sorted(os.listdir(extra_dir)):
+            if name.lower().endswith(".pdf"):
+                with open(os.path.join(extra_dir, name), "rb") as f:
+                    fixtures.append((name, "extra", f.read()))
+    return fixtures
@@ -0,0 +1,141 @@
+"""Offline end-to-end benchmarks.
+
+Starts local stand-ins for Gemini, Ollama, the crews' OpenAI endpoint and the
+scraped interview sites, points the app at them through environment
+variables, and times the resume, chat and code-generation paths. Results are
+written as JSON so runs can be compared across releases:
+
+    python -m benchmarks.run --iterations 20 --concurrency 4 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import pysqlite3
+
+    sys.modules['sqlite3'] = pysqlite3
+except ImportError:
+    pass
+
+from benchmarks.fixtures import fixture_corpus
+from benchmarks.stub_servers import StubConfig, StubServers
+
+
+class BenchmarkContext:
+    def __init__(self, stubs, fixtures, iterations, concurrency):
+        self.stubs = stubs
+        self.fixtures = fixtures
+        self.iterations = iterations
+        self.concurrency = concurrency
+        self.run_id = int(time.time())
+
+
+def configure_environment(stubs, workdir):
+    """Point every external dependency of the app at the stubs and keep all state in workdir."""
+    os.environ.update({
+        "API_URL": f"{stubs.base_url}/api/generate",
+        "GOOGLE_API_KEY": "benchmark",
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_API_BASE": f"{stubs.base_url}/v1",
+        "OPENAI_BASE_URL": f"{stubs.base_url}/v1",
+        "OTEL_SDK_DISABLED": "true",
+        "CREWAI_TELEMETRY_OPT_OUT": "true",
+        "INTERVIEW_TOOLS_MODE": "snapshot",
+        "CORPUS_DIR": os.path.join(workdir, "corpus"),
+        "RESULT_CACHE_DB": os.path.join(workdir, "result_cache.db"),
+        "SEMANTIC_CACHE_DB": os.path.join(workdir, "semantic_cache.db"),
+        "METRICS_DB_PATH": os.path.join(workdir, "metrics.db"),
+        "TRACE_PATH": os.path.join(workdir, "traces.jsonl"),
+        "PRELOAD_PAGES": "false",
+    })
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(results):
+    for result in results:
+        if "skipped" in result:
+            print(f"{result['name']:<40} skipped ({result['skipped']})", file=sys.stderr)
+            continue
+        latency = result["latency"] or {}
+        line = (f"{result['name']:<40} ok {result['succeeded']:>4}/{result['iterations']:<4} "
+                f"p50 {latency.get('p50', 0) * 1000:8.1f} ms  p95 {latency.get('p95', 0) * 1000:8.1f} ms  "
+                f"{result['throughput_per_s'] or 0:7.1f}/s")
+        if result.get("payload_bytes"):
+            line += f"  payload {result['payload_bytes']['mean'] / 1024:.1f} KiB"
+        if result.get("time_to_first_token"):
+            line += f"  ttft p50 {result['time_to_first_token']['p50'] * 1000:.1f} ms"
+        if result["errors"]:
+            line += f"  errors: {result['error_samples'][0]}"
+        print(line, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite against local stub services.")
+    from benchmarks.scenarios import SCENARIOS
+
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub time to first byte in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="uniform +/- jitter on the stub latency")
+    parser.add_argument("--payload-chars", type=int, default=2000, help="size of each generated response")
+    parser.add_argument("--stream-chunks", type=int, default=40, help="chunks per streamed response")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="delay between streamed chunks")
+    parser.add_argument("--fixtures", help="directory of extra resume PDFs to include")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    config = StubConfig(latency=args.latency, jitter=args.jitter, payload_chars=args.payload_chars,
+                        stream_chunks=args.stream_chunks, chunk_delay=args.chunk_delay)
+    stubs = StubServers(config).start()
+    with tempfile.TemporaryDirectory(prefix="resume-insight-bench-") as workdir:
+        configure_environment(stubs, workdir)
+        from benchmarks.scenarios import run_scenario
+
+        ctx = BenchmarkContext(stubs, fixture_corpus(args.fixtures), args.iterations, args.concurrency)
+        results = []
+        for name in args.scenarios or SCENARIOS:
+            scenario_results = run_scenario(name, ctx)
+            print_summary(scenario_results)
+            results.extend(scenario_results)
+    stubs.stop()
+
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "stub": config.to_dict(),
+            "stub_requests": stubs.requests,
+            "fixtures": [{"name": name, "kind": kind, "bytes": len(pdf)} for name, kind, pdf in ctx.fixtures],
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import base64
+import io
+import json
+import math
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from benchmarks.fixtures import SAMPLE_JOB_DESCRIPTION, make_page_image
+
+# Prompts used by the analysis scenarios (labels match the app's prompt buttons)
+ANALYSIS_PROMPT = "Percentage Match"
+CHAT_TOPIC = "ReactJS"
+CHAT_SOURCE = "reactjs"
+CHAT_QUESTIONS = [
+    "What is the virtual DOM and how does reconciliation work?",
+    "When should I use useMemo instead of useCallback?",
+    "How do controlled and uncontrolled components differ?",
+]
+CODE_PROMPT = "Write a function that merges overlapping intervals and explain its complexity."
+
+
+class Extras(dict):
+    """Per-call timings (e.g. time_to_first_token) an operation returns to have them summarized."""
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return {
+        "min": values[0],
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": values[-1],
+    }
+
+
+def measure(name, operation, iterations, concurrency=1, warmup=1):
+    """Call operation(i) `iterations` times on `concurrency` threads and return latency and throughput stats.
+
+    operation may return Extras with per-call timings, which are summarized
+    alongside the latency; any other return value is ignored.
+    """
+    for i in range(warmup):
+        try:
+            operation(-1 - i)
+        except Exception:
+            pass
+
+    latencies = []
+    extras = {}
+    errors = []
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            extra = operation(i)
+        except Exception as e:
+            return time.perf_counter() - start, None, f"{type(e).__name__}: {e}"
+        return time.perf_counter() - start, extra if isinstance(extra, Extras) else {}, None
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for latency, extra, error in executor.map(timed, range(iterations)):
+            if error is not None:
+                errors.append(error)
+                continue
+            latencies.append(latency)
+            for key, value in extra.items():
+                extras.setdefault(key, []).append(value)
+    wall_time = time.perf_counter() - wall_start
+
+    result = {
+        "name": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:3],
+        "wall_time": wall_time,
+        "throughput_per_s": len(latencies) / wall_time if wall_time else None,
+        "latency": summarize(latencies),
+    }
+    for key, values in extras.items():
+        result[key] = summarize(values)
+    return result
+
+
+def skipped(name, error):
+    return {"name": name, "skipped": f"{type(error).__name__}: {error}"}
+
+
+def _jsonable(part):
+    if isinstance(part, dict):
+        return {key: _jsonable(value) for key, value in part.items()}
+    if isinstance(part, (bytes, bytearray)):
+        return base64.b64encode(part).decode()
+    return part if isinstance(part, (str, int, float, bool)) or part is None else str(part)
+
+
+class StubGeminiModel:
+    """Stand-in for genai.GenerativeModel that sends the real request payload to the local Gemini stub."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def generate_content(self, contents, stream=False, generation_config=None):
+        from runtime import get_http_session
+
+        body = {"contents": [_jsonable(part) for part in contents], "stream": stream,
+                "response_mime_type": (generation_config or {}).get("response_mime_type")}
+        response = get_http_session().post(self.url, json=body, stream=stream, timeout=120)
+        response.raise_for_status()
+        if not stream:
+            text = response.json()["text"]
+            return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))])
+        return (
+            SimpleNamespace(text=message["text"])
+            for message in map(json.loads, filter(None, response.iter_lines()))
+            if "text" in message
+        )
+
+
+def install_stub_gemini(stubs):
+    """Route the app's Gemini calls to the stub server by pre-seeding runtime's model cache."""
+    import runtime
+    from resume_analysis import GEMINI_MODEL_NAME
+
+    runtime._models[GEMINI_MODEL_NAME] = StubGeminiModel(f"{stubs.base_url}/gemini/generate")
+
+
+def pdf_setup(ctx):
+    """input_pdf_setup on every fixture: text-layer fast path vs. rasterization."""
+    try:
+        from pdf_processing import input_pdf_setup
+    except ImportError as e:
+        return [skipped("input_pdf_setup", e)]
+    return [
+        measure(f"input_pdf_setup[{name}]", lambda i, pdf=pdf: input_pdf_setup(io.BytesIO(pdf)),
+                ctx.iterations, ctx.concurrency)
+        for name, _, pdf in ctx.fixtures
+    ]
+
+
+def _legacy_encode(image):
+    """The page encoding used before compress_page: default-quality RGB JPEG, base64 encoded."""
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG")
+    return base64.b64encode(buffer.getvalue())
+
+
+def payload_size(ctx):
+    """Bytes sent per page image versus encoding latency, for the legacy encoding and compress_page settings."""
+    try:
+        from pdf_processing import IMAGE_BYTE_BUDGET, compress_page, render_pages
+        pages = [("synthetic-mono", make_page_image(seed=1)), ("synthetic-color", make_page_image(seed=2, color=True))]
+    except ImportError as e:
+        return [skipped("payload_size", e)]
+    for name, kind, pdf in ctx.fixtures:
+        if kind != "text" and not name.endswith("-3p.pdf"):
+            try:
+                pages.append((name, render_pages(pdf, last_page=1)[0]))
+            except Exception as e:
+                print(f"payload_size: not rendering {name}: {e}", file=sys.stderr)
+
+    variants = [("legacy_jpeg_base64", _legacy_encode)]
+    for image_format in ("JPEG", "WEBP"):
+        for budget in (IMAGE_BYTE_BUDGET, IMAGE_BYTE_BUDGET // 2):
+            variants.append((
+                f"{image_format.lower()}_{budget // 1024}k",
+                lambda image, image_format=image_format, budget=budget: compress_page(image, budget, image_format)[0],
+            ))
+
+    results = []
+    for page_name, image in pages:
+        for variant, encode in variants:
+            results.append(measure(
+                f"payload[{page_name}:{variant}]",
+                lambda i, image=image, encode=encode: Extras(payload_bytes=len(encode(image))),
+                ctx.iterations, ctx.concurrency,
+            ))
+    return results
+
+
+def analysis(ctx):
+    """The work behind handle_submission: cache lookup, PDF conversion and a Gemini call (plain and streamed)."""
+    try:
+        from resume_analysis import analyze_resume_async
+        from runtime import run_async
+        install_stub_gemini(ctx.stubs)
+    except ImportError as e:
+        return [skipped("analysis", e)]
+
+    results = []
+    for name, kind, pdf in ctx.fixtures:
+        if kind == "extra" or name.endswith("-3p.pdf"):
+            continue
+        # A distinct prompt per call keeps every call a cache miss
+        results.append(measure(
+            f"analysis[{name}]",
+            lambda i, pdf=pdf: run_async(analyze_resume_async(pdf, SAMPLE_JOB_DESCRIPTION, f"{ANALYSIS_PROMPT} #{ctx.run_id}-{i}")),
+            ctx.iterations, ctx.concurrency,
+        ))
+
+        def streamed(i, pdf=pdf):
+            start = time.perf_counter()
+            first_chunk = []
+
+            def on_chunk(text_so_far):
+                if not first_chunk:
+                    first_chunk.append(time.perf_counter() - start)
+
+            run_async(analyze_resume_async(
+                pdf, SAMPLE_JOB_DESCRIPTION, f"{ANALYSIS_PROMPT} stream #{ctx.run_id}-{i}", on_chunk=on_chunk
+            ))
+            return Extras(time_to_first_token=first_chunk[0] if first_chunk else None)
+
+        results.append(measure(f"analysis_stream[{name}]", streamed, ctx.iterations, ctx.concurrency))
+
+    name, _, pdf = ctx.fixtures[0]
+    results.append(measure(
+        f"analysis_cached[{name}]",
+        lambda i: run_async(analyze_resume_async(pdf, SAMPLE_JOB_DESCRIPTION, f"{ANALYSIS_PROMPT} cached #{ctx.run_id}")),
+        ctx.iterations, ctx.concurrency,
+    ))
+    return results
+
+
+def crew_chat(ctx):
+    """Corpus snapshot refresh and hybrid search against the stub sites, then a full crew kickoff."""
+    try:
+        import corpus
+        import search_index
+    except ImportError as e:
+        return [skipped("crew_chat", e)]
+
+    for source in corpus.CORPUS_SOURCES:
+        corpus.CORPUS_SOURCES[source] = ctx.stubs.site_url(source)
+    results = [
+        measure("corpus_refresh", lambda i: corpus.refresh_source(CHAT_SOURCE, force=True), ctx.iterations, ctx.concurrency),
+        measure("corpus_refresh_not_modified", lambda i: corpus.refresh_source(CHAT_SOURCE), ctx.iterations, ctx.concurrency),
+    ]
+    search_index.build_index(CHAT_SOURCE)
+    results.append(measure(
+        "corpus_search",
+        lambda i: search_index.search(CHAT_SOURCE, CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)]),
+        ctx.iterations, ctx.concurrency,
+    ))
+
+    try:
+        from interview import kickoff_topic_crew
+    except Exception as e:
+        results.append(skipped("crew_chat", e))
+        return results
+    results.append(measure(
+        "crew_chat",
+        lambda i: kickoff_topic_crew(CHAT_TOPIC, CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)]),
+        ctx.iterations, ctx.concurrency,
+    ))
+    return results
+
+
+def code_generation(ctx):
+    """run_code_llama's request path against the stub Ollama endpoint, buffered and streamed."""
+    try:
+        from programming import ollama_client, stream_code_llama_async, url
+        from runtime import run_async
+    except ImportError as e:
+        return [skipped("code_generation", e)]
+
+    def request(stream):
+        return {"model": "LinguaLogic", "prompt": f"Language: Python\n{CODE_PROMPT}", "stream": stream}
+
+    def streamed(i):
+        start = time.perf_counter()
+        first_token = []
+
+        def on_token(code_so_far):
+            if not first_token:
+                first_token.append(time.perf_counter() - start)
+
+        run_async(stream_code_llama_async(request(True), on_token, None, "Python"))
+        return Extras(time_to_first_token=first_token[0] if first_token else None)
+
+    results = [
+        measure("code_generation", lambda i: run_async(ollama_client.post_json(url, request(False))),
+                ctx.iterations, ctx.concurrency),
+        measure("code_generation_stream", streamed, ctx.iterations, ctx.concurrency),
+    ]
+    run_async(ollama_client.close())
+    return results
+
+
+SCENARIOS = {
+    "pdf_setup": pdf_setup,
+    "payload_size": payload_size,
+    "analysis": analysis,
+    "crew_chat": crew_chat,
+    "code_generation": code_generation,
+}
+
+
+def run_scenario(name, ctx):
+    try:
+        return SCENARIOS[name](ctx)
+    except Exception as e:
+        traceback.print_exc()
+        return [skipped(name, e)]
@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import json
+import random
+import threading
+
+from aiohttp import web
+
+_WORDS = (
+    "component state props hook render virtual dom closure promise event loop module bundle "
+    "directive service dependency injection observable pipeline model feature gradient regression "
+    "cluster variance latency cache index query schema api endpoint test deploy container"
+).split()
+
+
+def filler_text(chars, seed=0):
+    """Deterministic pseudo-English text of roughly `chars` characters."""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < chars:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+class StubConfig:
+    """Latency and payload shape shared by every stub endpoint."""
+
+    def __init__(self, latency=0.2, jitter=0.05, payload_chars=2000, stream_chunks=40, chunk_delay=0.01):
+        self.latency = latency
+        self.jitter = jitter
+        self.payload_chars = payload_chars
+        self.stream_chunks = stream_chunks
+        self.chunk_delay = chunk_delay
+
+    def delay(self):
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class StubServers:
+    """Local stand-ins for Gemini, Ollama, the OpenAI API used by the crews and the scraped sites.
+
+    Runs an aiohttp app on its own thread and event loop so the code under
+    test talks to it over real sockets.
+    """
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or StubConfig()
+        self.host = host
+        self.port = port
+        self.requests = {}
+        self._loop = None
+        self._runner = None
+        self._started = threading.Event()
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _count(self, name):
+        self.requests[name] = self.requests.get(name, 0) + 1
+
+    async def _stream_ndjson(self, request, pieces, final):
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        for piece in pieces:
+            await response.write((json.dumps(piece) + "\n").encode("utf-8"))
+            await asyncio.sleep(self.config.chunk_delay)
+        await response.write((json.dumps(final) + "\n").encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    def _pieces(self, text):
+        size = max(1, len(text) // max(1, self.config.stream_chunks))
+        return [text[start:start + size] for start in range(0, len(text), size)]
+
+    async def gemini_generate(self, request):
+        self._count("gemini")
+        body = await request.json()
+        await asyncio.sleep(self.config.delay())
+        seed = len(json.dumps(body))
+        text = filler_text(self.config.payload_chars, seed=seed)
+        if body.get("response_mime_type") == "application/json":
+            text = json.dumps(self._structured_answer(seed))
+        if body.get("stream"):
+            return await self._stream_ndjson(request, [{"text": piece} for piece in self._pieces(text)], {"done": True})
+        return web.json_response({"text": text})
+
+    def _structured_answer(self, seed):
+        """A record shaped like the scoring prompts' response schemas."""
+        rng = random.Random(seed)
+        keywords = sorted(set(filler_text(200, seed=seed).split()))
+        matched = rng.sample(keywords, min(5, len(keywords)))
+        return {
+            "score": rng.randint(0, 100),
+            "summary": filler_text(min(self.config.payload_chars, 300), seed=seed),
+            "matched_keywords": matched,
+            "missing_keywords": [keyword for keyword in keywords if keyword not in matched][:5],
+            "red_flags": [],
+            "recommendation": "maybe",
+            "keyword_counts": [{"keyword": keyword, "count": rng.randint(1, 5)} for keyword in matched],
+        }
+
+    async def ollama_generate(self, request):
+        self._count("ollama")
+        body = await request.json()
+        await asyncio.sleep(self.config.delay())
+        text = filler_text(self.config.payload_chars, seed=len(body.get("prompt", "")))
+        context = list(body.get("context") or []) + list(range(len(text) // 4))
+        if body.get("stream", True):
+            pieces = [{"response": piece, "done": False} for piece in self._pieces(text)]
+            return await self._stream_ndjson(request, pieces, {"response": "", "done": True, "context": context})
+        return web.json_response({"response": text, "done": True, "context": context})
+
+    async def openai_chat(self, request):
+        self._count("openai_chat")
+        body = await request.json()
+        await asyncio.sleep(self.config.delay())
+        answer = filler_text(self.config.payload_chars, seed=len(json.dumps(body)))
+        content = f"Thought: I now know the final answer\nFinal Answer: {answer}"
+        return web.json_response({
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4},
+        })
+
+    async def openai_embeddings(self, request):
+        self._count("openai_embeddings")
+        body = await request.json()
+        inputs = body.get("input") or []
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        data = []
+        for number, text in enumerate(inputs):
+            rng = random.Random(hashlib.sha256(str(text).encode("utf-8")).digest())
+            data.append({"object": "embedding", "index": number, "embedding": [rng.uniform(-1, 1) for _ in range(1536)]})
+        return web.json_response({"object": "list", "data": data, "model": body.get("model", "stub"),
+                                  "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+
+    async def site_page(self, request):
+        """An interview-questions page like the ones the corpus snapshots, with ETag support."""
+        self._count("site")
+        source = request.match_info["source"]
+        rng = random.Random(source)
+        sections = []
+        length = 0
+        number = 0
+        while length < self.config.payload_chars * 10:
+            number += 1
+            topic = " ".join(rng.sample(_WORDS, 3))
+            answer = filler_text(600, seed=f"{source}-{number}")
+            sections.append(f"<h2>{number}. What is {topic} in {source}?</h2>\n<p>{answer}</p>")
+            length += len(answer)
+        page = f"<html><body><h1>{source} interview questions</h1>\n" + "\n".join(sections) + "</body></html>"
+        etag = '"' + hashlib.sha256(page.encode("utf-8")).hexdigest()[:16] + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        await asyncio.sleep(self.config.delay())
+        return web.Response(text=page, content_type="text/html", headers={"ETag": etag})
+
+    def site_url(self, source):
+        return f"{self.base_url}/sites/{source}"
+
+    def _app(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/gemini/generate", self.gemini_generate)
+        app.router.add_post("/api/generate", self.ollama_generate)
+        app.router.add_post("/v1/chat/completions", self.openai_chat)
+        app.router.add_post("/v1/embeddings", self.openai_embeddings)
+        app.router.add_get("/sites/{source}", self.site_page)
+        return app
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._runner = web.AppRunner(self._app(), access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._serve, name="benchmark-stubs", daemon=True).start()
+        self._started.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
@@ -1,60 +1,42 @@
 import streamlit as st
-from crewai import Crew, Process
-import asyncio
+from crew_registry import TOPICS, warm_crews_in_background
 import time
 from programming import run_code_llama  # Import programming model logic
+from runtime import dispatch_to_caller, get_session_id, run_async
+from metrics_store import TASK_CREW_CHAT, record_event
+from interview import answer_question_async
+from tracing import traced
 
-# Dynamically load agents and tasks
-AGENTS = {
-    "ReactJS": "reactjs_agent",
-    "Angular": "angular_agent",
-    "JavaScript": "javascript_agent",
-    "Vue.js": "vuejs_agent",
-    "Full Stack": "fullstack_agent",
-    "Data Science": "datascience_agent"
-}
-
-TASKS = {
-    "ReactJS": "reactjs_task",
-    "Angular": "angular_task",
-    "JavaScript": "javascript_task",
-    "Vue.js": "vuejs_task",
-    "Full Stack": "fullstack_task",
-    "Data Science": "datascience_task"
-}
-
-# Forming the interview preparation crew with sequential task execution
-def create_interview_crew(selected_topic):
-    return Crew(
-        agents=[AGENTS[selected_topic]],
-        tasks=[TASKS[selected_topic]],
-        process=Process.sequential,
-        memory=True,
-        cache=True,
-        max_rpm=100,
-        share_crew=True
-    )
+# Build one crew per topic up front so chat messages never pay for crew construction
+warm_crews_in_background()
+
+# Record a chatbot response time (must run on the Streamlit script thread)
+def record_chatbot_time(response_time, topic, cache_hit):
+    st.session_state.response_times.append(response_time)
+    st.session_state.total_chatbot_time += response_time
+    record_event(TASK_CREW_CHAT, response_time, session_id=get_session_id(), topic=topic, cache_hit=cache_hit)
 
 # Async function to kick off the interview preparation process
-async def prepare_interview_async(crew, topic):
+@traced("chat.interview")
+async def prepare_interview_async(topic, question):
     try:
         start_time = time.time()  # Start timer
-        # Run the crew kickoff asynchronously
-        result = await asyncio.to_thread(crew.kickoff, inputs={'topic': topic})  # Use to_thread for async task
+
+        # Served from the semantic answer cache when possible, otherwise by the topic's crew
+        result, cache_hit = await answer_question_async(topic, question)
         end_time = time.time()  # End timer
 
         # Update session state with response time
         response_time = round(end_time - start_time, 2)
-        st.session_state.response_times.append(response_time)
-        st.session_state.total_chatbot_time += response_time
+        dispatch_to_caller(record_chatbot_time)(response_time, topic, cache_hit)
 
         return result
     except Exception as e:
         return f"Error during preparation: {str(e)}"
 
 # Function to handle programming logic
-def handle_programming_task(language, prompt):
-    return run_code_llama(language, prompt)
+def handle_programming_task(language, prompt, on_token=None):
+    return run_code_llama(language, prompt, on_token=on_token)
 
 # Function to display the chatbot interface
 def chatBot():
@@ -101,7 +83,7 @@ def chatBot():
             # Second dropdown dynamically updates based on selected category
             with col2:
                 if category == "Interview Preparation":
-                    selected_topic = st.selectbox("Choose Interview Topic:", list(AGENTS.keys()), key="interview_topic")
+                    selected_topic = st.selectbox("Choose Interview Topic:", TOPICS, key="interview_topic")
                 elif category == "Programming":
                     language = st.selectbox("Select Programming Language", ["Python", "Java", "JavaScript", "C++", "Go", "Rust"], key="programming_language")
 
@@ -131,13 +113,10 @@ def chatBot():
             # Track the chatbot query count
             st.session_state.chatbot_queries += 1
 
-            # Prepare the interview using the selected topic's crew
-            interview_crew = create_interview_crew(selected_topic)
-
             # Display a progress spinner while processing the response
             with st.spinner("Preparing response..."):
-                # Use asyncio.run() in this synchronous context
-                response = asyncio.run(prepare_interview_async(interview_crew, selected_topic))
+                # Run on the shared background event loop instead of creating a new loop per message
+                response = run_async(prepare_interview_async(selected_topic, prompt))
 
             # Append the assistant's response and display it
             if response is None:
@@ -154,18 +133,37 @@ def chatBot():
         # Input for programming task (coding prompt)
         prompt = st.text_area("Enter your coding prompt:", key="code_prompt")
 
+        stream_code = st.checkbox("Stream code as it is generated", value=True, key="stream_code")
+
+        # Clicking Stop reruns the script, which interrupts and cancels the running generation
+        if st.session_state.get("stop_generation") and st.session_state.get("partial_code"):
+            st.info("Generation stopped.")
+            st.code(st.session_state.partial_code, language=language.lower())
+            st.session_state.partial_code = ""
+
         # Generate Code Button
         if st.button("Generate Code"):
             if prompt:
-                # Generate code using Code Llama logic from programming.py
-                response = handle_programming_task(language, prompt)
                 st.write(f"**Generated Code for {language}:**")
-                st.code(response, language=language.lower())  # Display the generated code with formatting
+                code_placeholder = st.empty()
+                on_token = None
+                if stream_code:
+                    st.button("Stop generation", key="stop_generation")
+
+                    def on_token(code_so_far):
+                        st.session_state.partial_code = code_so_far
+                        code_placeholder.code(code_so_far, language=language.lower())
+
+                # Generate code using Code Llama logic from programming.py
+                response = handle_programming_task(language, prompt, on_token=on_token)
+                st.session_state.partial_code = ""
+                code_placeholder.code(response, language=language.lower())  # Display the generated code with formatting
 
                 # After output, show the Clear Chat History button below the output
                 st.markdown("<br>", unsafe_allow_html=True)  # Add space after the output
                 if st.button("Clear Chat History"):
                     st.session_state["messages"] = []  # Clear the message history
+                    st.session_state.pop("history", None)  # Drop the code-generation history and server context
             else:
                 st.warning("Please enter a prompt to generate code.")
 
@@ -0,0 +1,286 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from html.parser import HTMLParser
+
+import requests
+
+from runtime import get_http_session
+
+# Snapshot location and refresh policy (overridable through environment variables)
+CORPUS_DIR = os.getenv("CORPUS_DIR", "corpus")
+CORPUS_MAX_AGE_SECONDS = int(os.getenv("CORPUS_MAX_AGE_SECONDS", 7 * 24 * 3600))
+CORPUS_FETCH_TIMEOUT = int(os.getenv("CORPUS_FETCH_TIMEOUT", 30))
+MAX_CHUNK_CHARS = 2000
+
+# Interview-question sources snapshotted to disk, keyed by source name
+CORPUS_SOURCES = {
+    "reactjs": "https://github.com/sudheerj/reactjs-interview-questions/blob/master/README.md",
+    "angular": "https://github.com/sudheerj/angular-interview-questions/blob/master/README.md",
+    "vuejs": "https://github.com/sudheerj/vuejs-interview-questions/blob/master/README.md",
+    "javascript": "https://github.com/ganqqwerty/123-Essential-JavaScript-Interview-Questions/blob/master/README.md",
+    "fullstack": "https://www.geeksforgeeks.org/full-stack-developer-interview-questions-and-answers/",
+    "datascience": "https://www.geeksforgeeks.org/data-science-interview-questions-and-answers/",
+}
+
+_GITHUB_BLOB_PATTERN = re.compile(r"^https://github\.com/([^/]+)/([^/]+)/blob/(.+)$")
+_HEADING_PATTERN = re.compile(r"^\s*(?:\d+\.\s*)?(#{1,6})\s+(.+?)\s*#*\s*$")
+
+logger = logging.getLogger(__name__)
+_cache_lock = threading.Lock()
+_loaded_chunks = {}
+_refreshing = set()
+
+
+def fetch_url(url):
+    """Return the URL actually downloaded: raw Markdown for GitHub blob pages, the page itself otherwise."""
+    match = _GITHUB_BLOB_PATTERN.match(url)
+    if match:
+        owner, repo, path = match.groups()
+        return f"https://raw.githubusercontent.com/{owner}/{repo}/{path}"
+    return url
+
+
+class _TextExtractor(HTMLParser):
+    """Turn an HTML page into Markdown-ish text, keeping headings and paragraph breaks."""
+
+    BLOCK_TAGS = {"p", "div", "li", "tr", "br", "pre", "section", "article", "table", "ul", "ol"}
+    SKIP_TAGS = {"script", "style", "noscript", "nav", "footer", "header", "svg", "form"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif re.fullmatch(r"h[1-6]", tag):
+            self.parts.append("\n\n" + "#" * int(tag[1]) + " ")
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif re.fullmatch(r"h[1-6]", tag) or tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def normalize(content, content_type=""):
+    """Normalize downloaded content to plain Markdown text."""
+    if "html" in content_type or content.lstrip().startswith("<"):
+        extractor = _TextExtractor()
+        extractor.feed(content)
+        content = "".join(extractor.parts)
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in content.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def chunk_text(text, max_chars=MAX_CHUNK_CHARS):
+    """Split normalized text into heading-scoped chunks of at most max_chars."""
+    sections = []
+    heading, lines = "", []
+    for line in text.splitlines():
+        match = _HEADING_PATTERN.match(line)
+        if match:
+            if lines:
+                sections.append((heading, "\n".join(lines).strip()))
+            heading, lines = match.group(2), []
+        else:
+            lines.append(line)
+    if lines:
+        sections.append((heading, "\n".join(lines).strip()))
+
+    chunks = []
+    for heading, body in sections:
+        if not body:
+            continue
+        current = ""
+        for paragraph in body.split("\n\n"):
+            for start in range(0, len(paragraph), max_chars):
+                piece = paragraph[start:start + max_chars]
+                if current and len(current) + len(piece) + 2 > max_chars:
+                    chunks.append({"heading": heading, "text": current})
+                    current = ""
+                current = f"{current}\n\n{piece}" if current else piece
+        if current:
+            chunks.append({"heading": heading, "text": current})
+    for number, chunk in enumerate(chunks):
+        chunk["id"] = number
+    return chunks
+
+
+def _source_dir(source):
+    return os.path.join(CORPUS_DIR, source)
+
+
+def _write_atomic(path, data):
+    """Write through a uniquely named hidden temp file, so concurrent refreshes never share one."""
+    tmp_file = tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix=".tmp",
+        delete=False
+    )
+    try:
+        with tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_file.name, path)
+    except BaseException:
+        os.remove(tmp_file.name)
+        raise
+
+
+def load_manifest(source):
+    """Return the snapshot manifest for a source, or None if it has never been snapshotted."""
+    try:
+        with open(os.path.join(_source_dir(source), "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def refresh_source(source, force=False):
+    """Conditionally re-download a source and write a new snapshot version if its content changed.
+
+    Uses ETag / Last-Modified validators from the previous snapshot. Returns the
+    current manifest; network errors leave the existing snapshot in place.
+    """
+    url = CORPUS_SOURCES[source]
+    manifest = load_manifest(source)
+    headers = {}
+    if manifest and not force:
+        if manifest.get("etag"):
+            headers["If-None-Match"] = manifest["etag"]
+        if manifest.get("last_modified"):
+            headers["If-Modified-Since"] = manifest["last_modified"]
+
+    try:
+        response = get_http_session().get(fetch_url(url), headers=headers, timeout=CORPUS_FETCH_TIMEOUT)
+        if response.status_code == 304 and manifest:
+            manifest["checked_at"] = time.time()
+            _write_atomic(os.path.join(_source_dir(source), "manifest.json"), json.dumps(manifest, indent=2))
+            return manifest
+        response.raise_for_status()
+    except requests.RequestException as e:
+        if manifest is None:
+            raise
+        logger.warning("Could not refresh %s corpus, keeping version %s: %s", source, manifest["version"], e)
+        return manifest
+
+    text = normalize(response.text, response.headers.get("Content-Type", ""))
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    now = time.time()
+    if manifest and manifest["sha256"] == digest:
+        manifest.update(etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"), checked_at=now)
+        _write_atomic(os.path.join(_source_dir(source), "manifest.json"), json.dumps(manifest, indent=2))
+        return manifest
+
+    version = (manifest["version"] + 1) if manifest else 1
+    chunks = chunk_text(text)
+    source_dir = _source_dir(source)
+    os.makedirs(source_dir, exist_ok=True)
+    chunks_file = f"chunks-v{version}.jsonl"
+    _write_atomic(os.path.join(source_dir, chunks_file), "\n".join(json.dumps(chunk) for chunk in chunks) + "\n")
+    new_manifest = {
+        "source": source,
+        "url": url,
+        "version": version,
+        "sha256": digest,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": now,
+        "checked_at": now,
+        "chunks_file": chunks_file,
+        "chunk_count": len(chunks),
+    }
+    _write_atomic(os.path.join(source_dir, "manifest.json"), json.dumps(new_manifest, indent=2))
+
+    # Drop superseded versions only after the manifest points at the new one; the previous
+    # version is kept so readers that loaded the old manifest can still open it
+    keep = {chunks_file, f"chunks-v{version - 1}.jsonl"}
+    for name in os.listdir(source_dir):
+        if name.startswith("chunks-v") and name not in keep:
+            os.remove(os.path.join(source_dir, name))
+    logger.info("Snapshotted %s corpus version %d (%d chunks)", source, version, len(chunks))
+    return new_manifest
+
+
+def _refresh_in_background(source):
+    with _cache_lock:
+        if source in _refreshing:
+            return
+        _refreshing.add(source)
+
+    def run():
+        try:
+            refresh_source(source)
+        except Exception as e:
+            logger.warning("Background refresh of %s corpus failed: %s", source, e)
+        finally:
+            with _cache_lock:
+                _refreshing.discard(source)
+
+    threading.Thread(target=run, name=f"corpus-refresh-{source}", daemon=True).start()
+
+
+def ensure_snapshot(source):
+    """Return the manifest, downloading the source if there is no snapshot yet.
+
+    Stale snapshots are served as-is while a conditional refresh runs in the background.
+    """
+    manifest = load_manifest(source)
+    if manifest is None:
+        return refresh_source(source)
+    if CORPUS_MAX_AGE_SECONDS and time.time() - manifest.get("checked_at", 0) > CORPUS_MAX_AGE_SECONDS:
+        _refresh_in_background(source)
+    return manifest
+
+
+def load_chunks(source):
+    """Return the snapshot's chunks, cached in memory per snapshot version."""
+    manifest = ensure_snapshot(source)
+    cache_key = (source, manifest["version"])
+    chunks = _loaded_chunks.get(cache_key)
+    if chunks is None:
+        with open(os.path.join(_source_dir(source), manifest["chunks_file"]), encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f if line.strip()]
+        with _cache_lock:
+            _loaded_chunks[cache_key] = chunks
+    return chunks
+
+
+def load_text(source):
+    """Return the full normalized snapshot text for a source."""
+    return "\n\n".join(
+        f"## {chunk['heading']}\n\n{chunk['text']}" if chunk["heading"] else chunk["text"]
+        for chunk in load_chunks(source)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot the interview-question corpus to disk.")
+    parser.add_argument("sources", nargs="*", help=f"sources to refresh (default: all of {', '.join(CORPUS_SOURCES)})")
+    parser.add_argument("--force", action="store_true", help="ignore ETag/Last-Modified and re-download")
+    args = parser.parse_args()
+    unknown = set(args.sources) - set(CORPUS_SOURCES)
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    for source in args.sources or CORPUS_SOURCES:
+        manifest = refresh_source(source, force=args.force)
+        print(f"{source}: version {manifest['version']}, {manifest['chunk_count']} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from typing import Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+import search_index
+from tracing import span
+
+# Number of question/answer chunks handed to the agent per search
+SEARCH_RESULTS = 5
+
+
+class SnapshotSearchToolSchema(BaseModel):
+    search_query: str = Field(..., description="Question or keywords to look up in the interview questions.")
+
+
+class SnapshotSearchTool(BaseTool):
+    """Offline retrieval tool: hybrid BM25 + vector search over the source's snapshot.
+
+    Replaces both ScrapeWebsiteTool and WebsiteSearchTool so agents receive a
+    few relevant chunks instead of a whole page.
+    """
+
+    name: str
+    description: str
+    source: str
+    args_schema: Type[BaseModel] = SnapshotSearchToolSchema
+
+    def _run(self, search_query: str) -> str:
+        with span("corpus.search", source=self.source) as current:
+            chunks = search_index.search(self.source, search_query, k=SEARCH_RESULTS)
+            current.set(results=len(chunks))
+        return "\n\n".join(
+            f"## {chunk['heading']}\n\n{chunk['text']}" for chunk in chunks
+        ) or "No matching interview questions found."
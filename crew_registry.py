@@ -0,0 +1,142 @@
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from crewai import Crew, Process
+from agents import reactjs_agent, angular_agent, javascript_agent, vuejs_agent, fullstack_agent, datascience_agent
+from tasks import reactjs_task, angular_task, javascript_task, vuejs_task, fullstack_task, datascience_task
+from tracing import span
+
+# Maximum number of crews kept per topic (concurrent chats on one topic beyond this wait)
+CREW_POOL_SIZE = int(os.getenv("CREW_POOL_SIZE", 2))
+# Seconds a chat waits for a busy topic's crew before giving up
+CREW_CHECKOUT_TIMEOUT = float(os.getenv("CREW_CHECKOUT_TIMEOUT", 120))
+
+# Interview topics and the real Agent/Task objects behind them
+TOPIC_CREWS = {
+    "ReactJS": (reactjs_agent, reactjs_task),
+    "Angular": (angular_agent, angular_task),
+    "JavaScript": (javascript_agent, javascript_task),
+    "Vue.js": (vuejs_agent, vuejs_task),
+    "Full Stack": (fullstack_agent, fullstack_task),
+    "Data Science": (datascience_agent, datascience_task)
+}
+
+TOPICS = list(TOPIC_CREWS)
+
+logger = logging.getLogger(__name__)
+
+
+class CrewUnavailableError(Exception):
+    """Every crew for a topic stayed busy for CREW_CHECKOUT_TIMEOUT seconds."""
+
+
+def build_crew(topic):
+    """Form the interview preparation crew for a topic with sequential task execution.
+
+    Memory is off: pooled crews serve every session in turn, so remembered
+    questions and answers would leak from one user's chat into another's.
+    """
+    agent, task = TOPIC_CREWS[topic]
+    return Crew(
+        agents=[agent],
+        tasks=[task],
+        process=Process.sequential,
+        memory=False,
+        cache=True,
+        max_rpm=100,
+        share_crew=True
+    )
+
+
+class CrewPool:
+    """Per-topic pool of prebuilt crews handed out to one session at a time.
+
+    The first crew uses the module-level agent and task; extra crews are deep
+    copies so two sessions never run kickoff on the same Task objects.
+    """
+
+    def __init__(self, topic, size=CREW_POOL_SIZE):
+        self.topic = topic
+        self.size = max(1, size)
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+            number = self._created
+        try:
+            crew = build_crew(self.topic) if number == 1 else build_crew(self.topic).copy()
+        except BaseException:
+            # Give the slot back so a failed build can be retried instead of starving acquire()
+            with self._lock:
+                self._created -= 1
+            raise
+        logger.info("Built %s crew %d/%d", self.topic, number, self.size)
+        return crew
+
+    def warm(self):
+        """Build the first crew ahead of time so the first message does not pay for it."""
+        if self._created == 0:
+            crew = self._create()
+            if crew is not None:
+                self._idle.put(crew)
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            crew = self._create()
+            if crew is not None:
+                return crew
+        try:
+            return self._idle.get(timeout=CREW_CHECKOUT_TIMEOUT)
+        except queue.Empty:
+            raise CrewUnavailableError(
+                f"All {self.size} {self.topic} crews stayed busy for {CREW_CHECKOUT_TIMEOUT:.0f}s; please try again"
+            ) from None
+
+    def release(self, crew):
+        self._idle.put(crew)
+
+
+_pools = {topic: CrewPool(topic) for topic in TOPICS}
+_warmup_started = False
+_warmup_lock = threading.Lock()
+
+
+@contextmanager
+def checkout_crew(topic):
+    """Borrow a ready crew for the topic, returning it to the pool afterwards."""
+    pool = _pools[topic]
+    with span("crew.checkout", topic=topic):
+        crew = pool.acquire()
+    try:
+        yield crew
+    finally:
+        pool.release(crew)
+
+
+def warm_crews(topics=None):
+    """Build one crew per topic so memory and tool setup happen before the first chat."""
+    for topic in topics or TOPICS:
+        try:
+            _pools[topic].warm()
+        except Exception as e:
+            logger.warning("Could not warm %s crew: %s", topic, e)
+
+
+def warm_crews_in_background():
+    """Start warming every topic's crew on a daemon thread, once per process."""
+    global _warmup_started
+    with _warmup_lock:
+        if _warmup_started:
+            return
+        _warmup_started = True
+    threading.Thread(target=warm_crews, name="crew-warmup", daemon=True).start()
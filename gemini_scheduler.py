@@ -0,0 +1,337 @@
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from tracing import bind_context, span
+
+# Quota configuration (overridable through environment variables). The defaults match
+# gemini-1.5-flash's first paid tier; the free tier is GEMINI_RPM=15, GEMINI_TPM=1000000.
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", 2000))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", 4_000_000))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 32))
+# Share of a minute's quota that may go out at once, after a cold start or an idle spell
+GEMINI_BURST_FRACTION = float(os.getenv("GEMINI_BURST_FRACTION", 0.1))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 4))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", 2.0))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", 60.0))
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", 300))
+GEMINI_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("GEMINI_OUTPUT_TOKEN_ESTIMATE", 800))
+
+# Lower values are admitted first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+# Gemini 1.5 bills every image as a fixed number of tokens
+IMAGE_TOKENS = 258
+CHARS_PER_TOKEN = 4
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiQuotaError(Exception):
+    """Gemini kept rejecting a request for quota, or it waited too long for a slot."""
+
+
+def is_rate_limited(error):
+    """True for HTTP 429 / RESOURCE_EXHAUSTED errors from the SDK or a raw HTTP client."""
+    status = getattr(error, "code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+
+def estimate_request_tokens(contents):
+    """Rough token cost of a generate_content call (input plus an expected response) for the TPM bucket."""
+    tokens = GEMINI_OUTPUT_TOKEN_ESTIMATE
+    for part in contents:
+        if isinstance(part, str):
+            tokens += len(part) // CHARS_PER_TOKEN
+        elif isinstance(part, dict) and str(part.get("mime_type", "")).startswith("image/"):
+            tokens += IMAGE_TOKENS
+        else:
+            tokens += len(str(part)) // CHARS_PER_TOKEN
+    return tokens
+
+
+def request_key(model_name, contents):
+    """Content hash identifying a request, so identical concurrent requests can share one call."""
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for part in contents:
+        if isinstance(part, dict):
+            digest.update(str(part.get("mime_type")).encode("utf-8"))
+            part = part.get("data", b"")
+        digest.update(part if isinstance(part, (bytes, bytearray)) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def usage_tokens(response):
+    """Tokens actually billed for a response, when the SDK reports them."""
+    return getattr(getattr(response, "usage_metadata", None), "total_token_count", None)
+
+
+class TokenBucket:
+    """Refills continuously up to capacity; usage beyond the estimate is carried as debt.
+
+    capacity is the largest burst admitted at once, so a bucket refilling at a
+    per-minute quota with a capacity of that whole quota could admit twice the
+    quota in its first minute; GeminiScheduler keeps it to GEMINI_BURST_FRACTION.
+    """
+
+    def __init__(self, capacity, per_second):
+        self.capacity = capacity
+        self.per_second = per_second
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.per_second)
+        self._updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.per_second
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _Ticket:
+    __slots__ = ("loop", "waiter", "cost", "priority", "order", "cancelled")
+
+    def __init__(self, loop, cost, priority, order):
+        self.loop = loop
+        self.waiter = loop.create_future()
+        self.cost = cost
+        self.priority = priority
+        self.order = order
+        self.cancelled = False
+
+
+class _SharedCall:
+    """One API call shared by concurrent identical requests, run at the most urgent caller's priority."""
+
+    __slots__ = ("future", "priority", "ticket")
+
+    def __init__(self, priority):
+        self.future = concurrent.futures.Future()
+        self.priority = priority
+        self.ticket = None
+
+
+class Reservation:
+    """Handed out by GeminiScheduler.reserve; set used_tokens once the real usage is known."""
+
+    def __init__(self, cost):
+        self.cost = cost
+        self.used_tokens = None
+
+
+class GeminiScheduler:
+    """Process-wide admission control for Gemini calls.
+
+    Requests wait in a priority queue (interactive before batch, FIFO within a
+    priority) until the RPM and TPM token buckets and the concurrency limit
+    allow them. A dispatcher thread admits them, so coroutines on any event
+    loop (the app's shared loop, the API server, the batch CLI) share one
+    quota. A 429 pauses admission for everyone, since the quota is shared,
+    and the request is queued again with exponential backoff. Admitted calls
+    run on the scheduler's own worker threads, one per concurrency slot.
+    """
+
+    def __init__(self, rpm=GEMINI_RPM, tpm=GEMINI_TPM, max_concurrency=GEMINI_MAX_CONCURRENCY,
+                 burst_fraction=GEMINI_BURST_FRACTION):
+        self.max_concurrency = max_concurrency
+        self._requests = TokenBucket(max(1, rpm * burst_fraction), rpm / 60)
+        self._tokens = TokenBucket(max(1, tpm * burst_fraction), tpm / 60)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="gemini-call")
+        self._condition = threading.Condition()
+        self._queue = []
+        self._order = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._shared_calls = {}
+        self._leader_tasks = set()
+        self.counters = {"admitted": 0, "coalesced": 0, "rate_limited": 0}
+        threading.Thread(target=self._dispatch_loop, name="gemini-scheduler", daemon=True).start()
+
+    def _dispatch_loop(self):
+        with self._condition:
+            while True:
+                # Drop cancelled tickets and the old entries of tickets promoted to a higher priority
+                while self._queue and (self._queue[0][2].cancelled or self._queue[0][0] != self._queue[0][2].priority):
+                    heapq.heappop(self._queue)
+                if not self._queue or self._in_flight >= self.max_concurrency:
+                    self._condition.wait()
+                    continue
+                ticket = self._queue[0][2]
+                now = time.monotonic()
+                delay = max(
+                    self._paused_until - now,
+                    self._requests.wait_time(1, now),
+                    self._tokens.wait_time(ticket.cost, now),
+                )
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._queue)
+                self._requests.take(1, now)
+                self._tokens.take(ticket.cost, now)
+                self._in_flight += 1
+                self.counters["admitted"] += 1
+                try:
+                    ticket.loop.call_soon_threadsafe(self._grant, ticket)
+                except RuntimeError:  # the waiting loop has been closed
+                    self._in_flight -= 1
+
+    def _grant(self, ticket):
+        if ticket.waiter.cancelled():
+            self._release(ticket.cost, None)
+        else:
+            ticket.waiter.set_result(None)
+
+    def _release(self, cost, used_tokens):
+        with self._condition:
+            self._in_flight -= 1
+            if used_tokens is not None:
+                self._tokens.adjust(cost - used_tokens)
+            self._condition.notify()
+
+    def _promote(self, ticket, priority):
+        """Move a queued ticket up to a more urgent priority, keeping its place in line (lock held)."""
+        if ticket is not None and not ticket.cancelled and priority < ticket.priority:
+            ticket.priority = priority
+            heapq.heappush(self._queue, (priority, ticket.order, ticket))
+            self._condition.notify()
+
+    def pause(self, seconds):
+        """Hold back every queued request for `seconds`."""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def reserve(self, cost, priority=PRIORITY_INTERACTIVE, shared=None):
+        """Wait for a request slot and `cost` tokens of quota, holding the slot for the block."""
+        with self._condition:
+            if shared is not None:
+                priority = shared.priority
+            ticket = _Ticket(asyncio.get_running_loop(), cost, priority, next(self._order))
+            heapq.heappush(self._queue, (priority, ticket.order, ticket))
+            if shared is not None:
+                shared.ticket = ticket
+            self._condition.notify()
+        try:
+            with span("gemini.schedule_wait", priority=priority, tokens=cost):
+                await asyncio.wait_for(ticket.waiter, GEMINI_QUEUE_TIMEOUT)
+        except BaseException as e:
+            with self._condition:
+                ticket.cancelled = True
+            if ticket.waiter.done() and not ticket.waiter.cancelled():
+                self._release(cost, None)
+            if isinstance(e, asyncio.TimeoutError):
+                raise GeminiQuotaError(
+                    f"Gemini is at its request quota; gave up after waiting {GEMINI_QUEUE_TIMEOUT:.0f}s"
+                ) from None
+            raise
+
+        reservation = Reservation(cost)
+        try:
+            yield reservation
+        finally:
+            self._release(cost, reservation.used_tokens)
+
+    async def backoff(self, error, attempt):
+        """Pause admission after a 429; raises GeminiQuotaError once attempts run out."""
+        self.counters["rate_limited"] += 1
+        if attempt >= GEMINI_MAX_RETRIES:
+            raise GeminiQuotaError(
+                "Gemini quota exceeded; please try again in a minute"
+            ) from error
+        delay = min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.75, 1.25)
+        logger.warning("Gemini rate limited (attempt %d), pausing requests for %.1fs: %s", attempt + 1, delay, error)
+        self.pause(delay)
+
+    def call(self, function, *args):
+        """Start a blocking SDK call on the scheduler's worker threads, in the caller's context; returns a future."""
+        return asyncio.get_running_loop().run_in_executor(self._executor, bind_context(function), *args)
+
+    async def _call_with_retries(self, function, cost, priority, shared=None):
+        for attempt in itertools.count():
+            async with self.reserve(cost, priority, shared) as reservation:
+                try:
+                    response = await self.call(function)
+                except Exception as e:
+                    if not is_rate_limited(e):
+                        raise
+                    error = e
+                else:
+                    reservation.used_tokens = usage_tokens(response)
+                    return response
+            await self.backoff(error, attempt)
+
+    def _settle(self, key, shared, task):
+        with self._condition:
+            self._shared_calls.pop(key, None)
+        self._leader_tasks.discard(task)
+        if task.cancelled():
+            shared.future.cancel()
+        elif task.exception() is not None:
+            shared.future.set_exception(task.exception())
+        else:
+            shared.future.set_result(task.result())
+
+    async def run(self, function, cost, priority=PRIORITY_INTERACTIVE, key=None):
+        """Call the blocking function() on a worker thread once admitted, retrying 429s with backoff.
+
+        Concurrent calls with the same key share one API call: the first one
+        makes it on its own task, so cancelling any caller never cancels the
+        call the others are waiting for. The shared call waits at the most
+        urgent priority among its callers, so an interactive click joining a
+        queued batch request is not held back to batch priority.
+        """
+        if key is None:
+            return await self._call_with_retries(function, cost, priority)
+
+        with self._condition:
+            shared = self._shared_calls.get(key)
+            leader = shared is None
+            if leader:
+                shared = self._shared_calls[key] = _SharedCall(priority)
+            else:
+                self.counters["coalesced"] += 1
+                shared.priority = min(shared.priority, priority)
+                self._promote(shared.ticket, priority)
+        if leader:
+            task = asyncio.get_running_loop().create_task(self._call_with_retries(function, cost, priority, shared))
+            self._leader_tasks.add(task)
+            task.add_done_callback(functools.partial(self._settle, key, shared))
+        with span("gemini.shared_call", leader=leader):
+            return await asyncio.shield(asyncio.wrap_future(shared.future))
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_gemini_scheduler():
+    """Return the process-wide Gemini scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = GeminiScheduler()
+    return _scheduler
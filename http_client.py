@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+import aiohttp
+
+# Connection pool size per client (overridable through environment variables)
+HTTP_CLIENT_POOL_SIZE = int(os.getenv("HTTP_CLIENT_POOL_SIZE", 20))
+
+# HTTP statuses worth retrying; everything else in 4xx is returned to the caller as an error
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class HttpClientError(Exception):
+    """Raised when a request fails for good (non-retryable status or retries exhausted)."""
+
+
+class DeadlineExceededError(HttpClientError):
+    """Raised when the overall deadline budget runs out before a successful response."""
+
+
+class CircuitOpenError(HttpClientError):
+    """Raised without touching the network while the backend is considered down."""
+
+
+def _describe(error):
+    return str(error) or type(error).__name__
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single probe through after reset_timeout."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_request(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self._probe_in_flight):
+                raise CircuitOpenError("Backend unavailable; circuit breaker is open")
+            if state == "half-open":
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """End a half-open probe that said nothing about the backend (cancelled or malformed)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class AsyncHttpClient:
+    """Pooled aiohttp client with exponential backoff + full jitter, a deadline budget and a circuit breaker.
+
+    One ClientSession (and its keep-alive connection pool) is kept per event
+    loop, so calls made through runtime.run_async all share the same pool.
+    """
+
+    def __init__(self, deadline=180.0, attempt_timeout=120.0, max_attempts=5,
+                 backoff_base=0.5, backoff_cap=8.0, breaker=None, headers=None):
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker()
+        self.headers = headers or {}
+        self._sessions = {}
+
+    def _session(self):
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=HTTP_CLIENT_POOL_SIZE, keepalive_timeout=60)
+            session = self._sessions[loop] = aiohttp.ClientSession(connector=connector, headers=self.headers)
+        return session
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    async def request(self, method, url, on_retry=None, stream=False, read=None, **kwargs):
+        """Send a request with retries and return the open response (use it as an async context manager).
+
+        With stream=True the attempt timeout bounds connecting and each read
+        instead of the whole body, so long streamed responses are not cut off.
+        When read is given, the body is read with `await read(response)` as
+        part of the attempt (a slow or truncated body is retried like any
+        other transport error) and its result is returned instead.
+        """
+        deadline_at = time.monotonic() + self.deadline
+        last_error = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                delay = self._backoff(attempt)
+                if time.monotonic() + delay >= deadline_at:
+                    raise DeadlineExceededError(f"No response from {url} within {self.deadline:.0f}s: {_describe(last_error)}")
+                if on_retry is not None:
+                    on_retry(attempt, self.max_attempts, last_error)
+                await asyncio.sleep(delay)
+
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceededError(f"No response from {url} within {self.deadline:.0f}s: {_describe(last_error)}")
+            attempt_timeout = min(self.attempt_timeout, remaining)
+            if stream:
+                timeout = aiohttp.ClientTimeout(total=None, sock_connect=attempt_timeout, sock_read=self.attempt_timeout)
+            else:
+                timeout = aiohttp.ClientTimeout(total=attempt_timeout)
+            self.breaker.before_request()
+            try:
+                response = await self._session().request(method, url, timeout=timeout, **kwargs)
+            except (TypeError, ValueError) as e:
+                # A malformed request (e.g. no URL configured) never reached the backend; retrying cannot help
+                self.breaker.release_probe()
+                raise HttpClientError(f"Invalid request to {url}: {_describe(e)}") from e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.breaker.record_failure()
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelled (e.g. the caller disconnected); a half-open breaker must not wait forever on this probe
+                self.breaker.release_probe()
+                raise
+
+            if response.status in RETRYABLE_STATUSES:
+                self.breaker.record_failure()
+                last_error = HttpClientError(f"HTTP {response.status} from {url}")
+                response.release()
+                continue
+            if response.status >= 400:
+                self.breaker.record_success()
+                response.release()
+                raise HttpClientError(f"HTTP {response.status} from {url}")
+            if read is None:
+                self.breaker.record_success()
+                return response
+            try:
+                async with response:
+                    result = await read(response)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.breaker.record_failure()
+                last_error = e
+                continue
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            self.breaker.record_success()
+            return result
+
+        raise HttpClientError(f"Request to {url} failed after {self.max_attempts} attempts: {_describe(last_error)}")
+
+    async def post_json(self, url, payload, on_retry=None):
+        """POST a JSON payload and return the decoded JSON response."""
+        return await self.request(
+            "POST", url, json=payload, on_retry=on_retry, read=lambda response: response.json(content_type=None)
+        )
+
+    async def stream_json_lines(self, url, payload, on_retry=None):
+        """POST a JSON payload and yield each decoded line of an NDJSON response as it arrives.
+
+        Retries only apply until the response starts; a stream that stalls or
+        breaks off afterwards counts as a backend failure and raises
+        HttpClientError. Cancelling the consumer closes the connection, which
+        aborts the generation on the server.
+        """
+        response = await self.request("POST", url, json=payload, on_retry=on_retry, stream=True)
+        async with response:
+            try:
+                async for line in response.content:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.breaker.record_failure()
+                raise HttpClientError(f"Stream from {url} broke off: {_describe(e)}") from e
+
+    async def close(self):
+        for session in list(self._sessions.values()):
+            await session.close()
+        self._sessions.clear()
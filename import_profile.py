@@ -0,0 +1,111 @@
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+
+from page_loader import PAGE_MODULES
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+STAGE_MARKER = "@@stage "
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# Runs in a fresh interpreter with -X importtime; imports each stage's modules in order
+_STAGE_RUNNER = """
+import importlib, json, sys, time
+try:
+    import pysqlite3
+    sys.modules['sqlite3'] = pysqlite3
+except ImportError:
+    pass
+for stage, modules in json.loads(sys.argv[1]):
+    sys.stderr.write("{marker}" + stage + "\\n")
+    sys.stderr.flush()
+    start = time.perf_counter()
+    errors = []
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            errors.append(f"{{module}}: {{type(e).__name__}}: {{e}}")
+    elapsed = time.perf_counter() - start
+    print(json.dumps({{"stage": stage, "seconds": elapsed, "errors": errors}}), flush=True)
+""".format(marker=STAGE_MARKER)
+
+
+def home_modules(app_script=APP_SCRIPT):
+    """Top-level modules app.py imports before it renders the Home page."""
+    with open(app_script, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def profile_stages(stages):
+    """Import each stage in one fresh interpreter and return per-stage totals and heaviest imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _STAGE_RUNNER, json.dumps(stages)],
+        capture_output=True, text=True, cwd=os.path.dirname(APP_SCRIPT),
+    )
+    report = {}
+    for line in result.stdout.splitlines():
+        summary = json.loads(line)
+        stage = summary.pop("stage")
+        report[stage] = {**summary, "imports": []}
+
+    stage = None
+    for line in result.stderr.splitlines():
+        if line.startswith(STAGE_MARKER):
+            stage = line[len(STAGE_MARKER):]
+            continue
+        match = _IMPORTTIME_LINE.match(line)
+        if match and stage in report:
+            self_us, cumulative_us, indent, name = match.groups()
+            report[stage]["imports"].append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "top_level": len(indent) <= 1,
+            })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report import time of the Home page and of each lazily loaded page (in page-open order)."
+    )
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports to list per stage")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    stages = [["Home", home_modules()]]
+    stages.extend([page, [module_name]] for page, (module_name, _) in PAGE_MODULES.items())
+    report = profile_stages(stages)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for stage, _ in stages:
+        entry = report.get(stage)
+        if entry is None:
+            print(f"{stage}: not profiled")
+            continue
+        print(f"{stage}: {entry['seconds']:.2f}s")
+        for error in entry["errors"]:
+            print(f"  failed to import {error}")
+        top_level = [item for item in entry["imports"] if item["top_level"]]
+        for item in sorted(top_level, key=lambda item: -item["cumulative_ms"])[:args.top]:
+            print(f"  {item['cumulative_ms']:9.1f} ms  {item['module']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import asyncio
+
+from crew_registry import checkout_crew
+from semantic_cache import get_semantic_cache
+from tracing import span
+
+
+def kickoff_topic_crew(topic, question):
+    """Run a crew kickoff with a crew borrowed from the topic's pool."""
+    with checkout_crew(topic) as crew, span("crew.kickoff", topic=topic):
+        return str(crew.kickoff(inputs={'topic': topic, 'question': question}))
+
+
+async def answer_question_async(topic, question):
+    """Answer an interview question; returns (answer, cache_hit).
+
+    Near-identical questions asked before (in any session or API call) are
+    answered from the semantic cache; otherwise the topic's crew runs on a
+    worker thread and its answer is cached.
+    """
+    semantic_cache = get_semantic_cache()
+    with span("semantic_cache.lookup", topic=topic) as current:
+        answer = await asyncio.to_thread(semantic_cache.get, topic, question)
+        cache_hit = answer is not None
+        current.set(hit=cache_hit)
+
+    if not cache_hit:
+        answer = await asyncio.to_thread(kickoff_topic_crew, topic, question)
+        with span("semantic_cache.store", topic=topic):
+            await asyncio.to_thread(semantic_cache.set, topic, question, answer)
+    return answer, cache_hit
@@ -0,0 +1,148 @@
+import math
+import os
+import threading
+from collections import deque
+
+from metrics_store import get_metrics_store
+
+# Number of most recent events kept for the response-time chart
+RECENT_EVENTS = int(os.getenv("METRICS_RECENT_EVENTS", 500))
+
+# Events folded in per read when catching up with the store
+REFRESH_BATCH_SIZE = 1000
+
+
+class LatencyHistogram:
+    """Fixed log-scale buckets: O(1) inserts and O(buckets) percentiles, independent of event count.
+
+    With 5% bucket growth the reported percentiles are within ~5% of the exact value.
+    """
+
+    MIN_SECONDS = 0.001
+    MAX_SECONDS = 3600.0
+    GROWTH = 1.05
+
+    def __init__(self):
+        self._log_growth = math.log(self.GROWTH)
+        bucket_count = int(math.ceil(math.log(self.MAX_SECONDS / self.MIN_SECONDS) / self._log_growth)) + 1
+        self.buckets = [0] * bucket_count
+        self.count = 0
+
+    def _bucket_index(self, value):
+        if value <= self.MIN_SECONDS:
+            return 0
+        index = int(math.log(value / self.MIN_SECONDS) / self._log_growth) + 1
+        return min(index, len(self.buckets) - 1)
+
+    def add(self, value):
+        self.buckets[self._bucket_index(value)] += 1
+        self.count += 1
+
+    def percentile(self, q):
+        """Return the q-th percentile (0-100) as the upper bound of the bucket that contains it."""
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return self.MIN_SECONDS * self.GROWTH ** index
+        return self.MAX_SECONDS
+
+
+class TaskAggregate:
+    """Running count, sums and latency distribution for one task type."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.ttft_count = 0
+        self.ttft_total = 0.0
+        self.histogram = LatencyHistogram()
+
+    def add(self, event):
+        self.count += 1
+        self.total_time += event["duration"]
+        self.histogram.add(event["duration"])
+        if event["time_to_first_token"] is not None:
+            self.ttft_count += 1
+            self.ttft_total += event["time_to_first_token"]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_time": self.total_time,
+            "mean": self.total_time / self.count if self.count else None,
+            "p50": self.histogram.percentile(50),
+            "p95": self.histogram.percentile(95),
+            "p99": self.histogram.percentile(99),
+            "mean_time_to_first_token": self.ttft_total / self.ttft_count if self.ttft_count else None,
+        }
+
+
+class MetricsAggregator:
+    """Keeps per-task aggregates up to date by folding in only events it has not seen yet.
+
+    snapshot() returns a cached, precomputed view that is rebuilt only when the
+    store reports new events (or a reset), so the dashboard renders in constant
+    time regardless of how many interactions have been recorded.
+    """
+
+    def __init__(self, store=None):
+        self.store = store or get_metrics_store()
+        self._lock = threading.Lock()
+        self._clear(generation=None)
+
+    def _clear(self, generation):
+        self._generation = generation
+        self._last_event_id = 0
+        self._tasks = {}
+        self._recent = deque(maxlen=RECENT_EVENTS)
+        self._snapshot = None
+
+    def refresh(self):
+        """Fold any new events into the running aggregates; returns True if anything changed."""
+        generation, last_event_id = self.store.get_state()
+        with self._lock:
+            changed = False
+            if generation != self._generation:
+                self._clear(generation)
+                changed = True
+            while self._last_event_id < last_event_id:
+                events = self.store.get_events(after_id=self._last_event_id, limit=REFRESH_BATCH_SIZE)
+                if not events:
+                    break
+                for event in events:
+                    self._tasks.setdefault(event["task"], TaskAggregate()).add(event)
+                    self._recent.append((event["task"], event["duration"]))
+                self._last_event_id = events[-1]["id"]
+                changed = True
+            if changed:
+                self._snapshot = None
+            return changed
+
+    def snapshot(self):
+        """Return {"tasks": {task: summary}, "recent": [(task, duration), ...]}."""
+        self.refresh()
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = {
+                    "tasks": {task: aggregate.summary() for task, aggregate in self._tasks.items()},
+                    "recent": list(self._recent),
+                }
+            return self._snapshot
+
+
+_metrics_aggregator = None
+_metrics_aggregator_lock = threading.Lock()
+
+
+def get_metrics_aggregator():
+    """Return the process-wide aggregator, creating it on first use."""
+    global _metrics_aggregator
+    if _metrics_aggregator is None:
+        with _metrics_aggregator_lock:
+            if _metrics_aggregator is None:
+                _metrics_aggregator = MetricsAggregator()
+    return _metrics_aggregator
@@ -0,0 +1,152 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from tracing import span
+
+# Metrics database location (overridable through environment variables)
+METRICS_DB_PATH = os.getenv("METRICS_DB_PATH", "metrics.db")
+
+# Task types recorded by the app
+TASK_GEMINI_ANALYSIS = "gemini_analysis"
+TASK_CREW_CHAT = "crew_chat"
+TASK_CODE_GENERATION = "code_generation"
+
+TASK_LABELS = {
+    TASK_GEMINI_ANALYSIS: "Gemini Analysis",
+    TASK_CREW_CHAT: "Crew Chat",
+    TASK_CODE_GENERATION: "Code Generation",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    session_id TEXT,
+    task TEXT NOT NULL,
+    duration REAL NOT NULL,
+    time_to_first_token REAL,
+    attributes TEXT
+);
+CREATE TABLE IF NOT EXISTS task_totals (
+    session_id TEXT NOT NULL,
+    task TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total_time REAL NOT NULL,
+    PRIMARY KEY (session_id, task)
+);
+"""
+
+
+class MetricsStore:
+    """Append-only event log plus per-session, per-task totals in SQLite (WAL mode).
+
+    Each event costs one INSERT and one UPSERT in a single transaction, so the
+    write cost stays constant as history grows and concurrent sessions never
+    overwrite each other's counters.
+    """
+
+    def __init__(self, db_path=METRICS_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def _connection(self):
+        """Return this thread's connection; SQLite connections are not shared across threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record_event(self, task, duration, session_id=None, time_to_first_token=None, **attributes):
+        """Append one event and bump the matching totals row atomically; returns the event id."""
+        conn = self._connection()
+        session_key = session_id or ""
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO events (ts, session_id, task, duration, time_to_first_token, attributes) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (time.time(), session_id, task, duration, time_to_first_token,
+                 json.dumps(attributes) if attributes else None),
+            )
+            conn.execute(
+                "INSERT INTO task_totals (session_id, task, count, total_time) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT (session_id, task) DO UPDATE SET "
+                "count = count + 1, total_time = total_time + excluded.total_time",
+                (session_key, task, duration),
+            )
+        return cursor.lastrowid
+
+    def get_totals(self, session_id=None):
+        """Return {task: {"count", "total_time"}} across all sessions, or for one session."""
+        query = "SELECT task, SUM(count), SUM(total_time) FROM task_totals"
+        params = ()
+        if session_id is not None:
+            query += " WHERE session_id = ?"
+            params = (session_id,)
+        rows = self._connection().execute(query + " GROUP BY task", params).fetchall()
+        return {task: {"count": count, "total_time": total_time} for task, count, total_time in rows}
+
+    def get_events(self, after_id=0, limit=None):
+        """Return events with id > after_id in insertion order as dicts."""
+        query = "SELECT id, ts, session_id, task, duration, time_to_first_token, attributes FROM events WHERE id > ? ORDER BY id"
+        params = (after_id,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        columns = ("id", "ts", "session_id", "task", "duration", "time_to_first_token", "attributes")
+        events = []
+        for row in self._connection().execute(query, params):
+            event = dict(zip(columns, row))
+            event["attributes"] = json.loads(event["attributes"]) if event["attributes"] else {}
+            events.append(event)
+        return events
+
+    def get_state(self):
+        """Return (generation, last_event_id); cheap enough to poll on every dashboard render.
+
+        The generation (stored in PRAGMA user_version) changes on every reset so
+        readers holding running aggregates know to start over.
+        """
+        conn = self._connection()
+        (generation,) = conn.execute("PRAGMA user_version").fetchone()
+        (last_event_id,) = conn.execute("SELECT MAX(id) FROM events").fetchone()
+        return generation, last_event_id or 0
+
+    def reset(self):
+        """Delete all recorded events and totals."""
+        conn = self._connection()
+        with conn:
+            (generation,) = conn.execute("PRAGMA user_version").fetchone()
+            conn.execute("DELETE FROM events")
+            conn.execute("DELETE FROM task_totals")
+            conn.execute(f"PRAGMA user_version = {int(generation) + 1}")
+
+
+_metrics_store = None
+_metrics_store_lock = threading.Lock()
+
+
+def get_metrics_store():
+    """Return the process-wide metrics store, creating it on first use."""
+    global _metrics_store
+    if _metrics_store is None:
+        with _metrics_store_lock:
+            if _metrics_store is None:
+                _metrics_store = MetricsStore()
+    return _metrics_store
+
+
+def record_event(task, duration, session_id=None, time_to_first_token=None, **attributes):
+    """Record one timed interaction in the process-wide metrics store."""
+    with span("metrics.record", task=task):
+        return get_metrics_store().record_event(
+            task, duration, session_id=session_id, time_to_first_token=time_to_first_token, **attributes
+        )
@@ -0,0 +1,72 @@
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+# Page name -> (module, render function); each module is imported the first time its page is opened
+PAGE_MODULES = {
+    "chatBot": ("chatbot", "chatBot"),
+    "Analytics": ("Analytics", "analytics_page"),
+}
+
+# Import the page modules on a background thread once the Home page has rendered
+PRELOAD_PAGES = os.getenv("PRELOAD_PAGES", "true").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+_load_times = {}
+_preload_started = False
+_lock = threading.Lock()
+
+
+def import_module_timed(module_name):
+    """Import a module, logging how long the first import took.
+
+    importlib.import_module is always called, even when the module is already
+    in sys.modules: if the background preload is still executing it, the call
+    waits on the module's import lock instead of returning a half-initialized
+    module.
+    """
+    importing = module_name not in sys.modules
+    start_time = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if importing:
+        elapsed = time.perf_counter() - start_time
+        with _lock:
+            _load_times.setdefault(module_name, elapsed)
+        logger.info("Imported %s in %.2fs", module_name, elapsed)
+    return module
+
+
+def load_page(page):
+    """Return the render function of a page, importing its module (and heavy dependencies) on first use."""
+    module_name, function_name = PAGE_MODULES[page]
+    return getattr(import_module_timed(module_name), function_name)
+
+
+def get_load_times():
+    """Return the first-import time in seconds of each lazily loaded module."""
+    with _lock:
+        return dict(_load_times)
+
+
+def _preload_pages():
+    for module_name, _ in PAGE_MODULES.values():
+        try:
+            import_module_timed(module_name)
+        except Exception:
+            logger.exception("Preloading %s failed; it will be imported when its page opens", module_name)
+
+
+def preload_pages_in_background():
+    """Warm the page modules off the script thread so the first visit to a page is fast too."""
+    global _preload_started
+    if not PRELOAD_PAGES or _preload_started:
+        return
+    with _lock:
+        if _preload_started:
+            return
+        _preload_started = True
+    threading.Thread(target=_preload_pages, name="page-preload", daemon=True).start()
@@ -0,0 +1,207 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import bind_context, span
+
+# Rasterization configuration (overridable through environment variables)
+RASTER_DPI = int(os.getenv("PDF_RASTER_DPI", 150))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 5))
+RASTER_WORKERS = int(os.getenv("PDF_RASTER_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Text-layer fast path configuration
+TEXT_FAST_PATH = os.getenv("PDF_TEXT_FAST_PATH", "true").lower() == "true"
+MIN_TEXT_CHARS_PER_PAGE = int(os.getenv("PDF_MIN_TEXT_CHARS_PER_PAGE", 200))
+MIN_TEXT_PRINTABLE_RATIO = 0.9
+
+# Page image encoding configuration
+# WebP is ~15% smaller than JPEG at equal quality but ~30x slower to encode
+IMAGE_FORMAT = os.getenv("PDF_IMAGE_FORMAT", "JPEG").upper()  # JPEG or WEBP
+IMAGE_BYTE_BUDGET = int(os.getenv("PDF_IMAGE_BYTE_BUDGET", 150 * 1024))  # per page
+IMAGE_GRAYSCALE = os.getenv("PDF_IMAGE_GRAYSCALE", "auto").lower()  # auto, true or false
+IMAGE_MAX_LONG_EDGE = int(os.getenv("PDF_IMAGE_MAX_LONG_EDGE", 2000))
+# Below roughly 100 DPI on a letter page, 9-10pt resume text stops being legible
+IMAGE_MIN_LONG_EDGE = int(os.getenv("PDF_IMAGE_MIN_LONG_EDGE", 1100))
+IMAGE_MAX_QUALITY = 85
+IMAGE_MIN_QUALITY = 35
+IMAGE_MAX_DOWNSCALE = 0.9  # each downscale shrinks the long edge by at least 10%
+# Pages whose mean saturation (0-255) stays below this are sent as grayscale
+GRAYSCALE_MAX_SATURATION = 20
+
+logger = logging.getLogger(__name__)
+
+
+def conversion_settings(max_pages=PDF_MAX_PAGES, dpi=RASTER_DPI, prefer_text=TEXT_FAST_PATH):
+    """Describe every setting that shapes input_pdf_setup's output, for use in result cache keys."""
+    return (
+        f"pages={max_pages};dpi={dpi};text={prefer_text}/{MIN_TEXT_CHARS_PER_PAGE};format={IMAGE_FORMAT};"
+        f"budget={IMAGE_BYTE_BUDGET};grayscale={IMAGE_GRAYSCALE};edge={IMAGE_MIN_LONG_EDGE}-{IMAGE_MAX_LONG_EDGE}"
+    )
+
+
+def count_pages(pdf_bytes):
+    """Return the number of pages in a PDF without rendering it."""
+    import pdf2image  # PDF libraries are imported on first use to keep them off the app's cold start
+
+    info = pdf2image.pdfinfo_from_bytes(pdf_bytes)
+    return int(info["Pages"])
+
+
+def _render_page(pdf_bytes, page_number, dpi):
+    """Render a single page; each call runs its own poppler process."""
+    import pdf2image
+
+    with span("pdf.render_page", page=page_number, dpi=dpi):
+        return pdf2image.convert_from_bytes(
+            pdf_bytes, dpi=dpi, first_page=page_number, last_page=page_number
+        )[0]
+
+
+def render_pages(pdf_bytes, first_page=1, last_page=None, dpi=RASTER_DPI, max_workers=RASTER_WORKERS):
+    """Render only the requested page range, one page per worker, and return the images in page order."""
+    total_pages = count_pages(pdf_bytes)
+    last_page = total_pages if last_page is None else min(last_page, total_pages)
+    page_numbers = list(range(max(first_page, 1), last_page + 1))
+    if not page_numbers:
+        return []
+    if len(page_numbers) == 1 or max_workers <= 1:
+        return [_render_page(pdf_bytes, number, dpi) for number in page_numbers]
+
+    # poppler runs out of process, so a thread pool is enough to render pages in parallel
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(page_numbers))) as executor:
+        # Bind on the calling thread: the workers have no current span of their own to attach to
+        futures = [executor.submit(bind_context(_render_page), pdf_bytes, number, dpi) for number in page_numbers]
+        return [future.result() for future in futures]
+
+
+def is_mostly_monochrome(image):
+    """True when a page has little color, e.g. black text with a colored heading or two."""
+    if image.mode in ("1", "L"):
+        return True
+    from PIL import ImageStat
+
+    saturation = image.convert("RGB").resize((64, 64)).convert("HSV").getchannel("S")
+    return ImageStat.Stat(saturation).mean[0] < GRAYSCALE_MAX_SATURATION
+
+
+def _fit_long_edge(image, long_edge):
+    scale = long_edge / max(image.size)
+    if scale >= 1:
+        return image
+    from PIL import Image
+
+    return image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+
+
+def _save(image, image_format, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=quality)
+    return buffer.getvalue()
+
+
+def compress_page(image, byte_budget=IMAGE_BYTE_BUDGET, image_format=IMAGE_FORMAT, grayscale=IMAGE_GRAYSCALE):
+    """Encode a page at the highest quality and resolution that fits byte_budget.
+
+    Quality is binary-searched between IMAGE_MIN_QUALITY and IMAGE_MAX_QUALITY;
+    when even the lowest quality is over budget the page is downscaled and the
+    search repeated, but never below IMAGE_MIN_LONG_EDGE, where legibility wins
+    over the budget. Returns (bytes, details).
+    """
+    if grayscale == "true" or (grayscale == "auto" and is_mostly_monochrome(image)):
+        image = image.convert("L")
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    image = _fit_long_edge(image, IMAGE_MAX_LONG_EDGE)
+
+    while True:
+        details = {"format": image_format, "size": image.size, "grayscale": image.mode == "L"}
+        data = _save(image, image_format, IMAGE_MAX_QUALITY)
+        if len(data) <= byte_budget:
+            return data, {**details, "quality": IMAGE_MAX_QUALITY}
+        smallest = _save(image, image_format, IMAGE_MIN_QUALITY)
+        if len(smallest) <= byte_budget:
+            best, best_quality = smallest, IMAGE_MIN_QUALITY
+            low, high = IMAGE_MIN_QUALITY + 1, IMAGE_MAX_QUALITY - 1
+            while low <= high:
+                quality = (low + high) // 2
+                data = _save(image, image_format, quality)
+                if len(data) <= byte_budget:
+                    best, best_quality, low = data, quality, quality + 1
+                else:
+                    high = quality - 1
+            return best, {**details, "quality": best_quality}
+        if max(image.size) <= IMAGE_MIN_LONG_EDGE:
+            return smallest, {**details, "quality": IMAGE_MIN_QUALITY, "over_budget": True}
+        # Encoded size grows roughly with the pixel count, so aim the next size straight at the budget
+        scale = min(IMAGE_MAX_DOWNSCALE, 0.95 * (byte_budget / len(smallest)) ** 0.5)
+        image = _fit_long_edge(image, max(IMAGE_MIN_LONG_EDGE, int(max(image.size) * scale)))
+
+
+def encode_page(image):
+    """Encode a rendered page as an image part for the Gemini API.
+
+    The SDK takes raw bytes in inline data, so the page is not base64-encoded
+    here; that would only add a third to the payload held in memory.
+    """
+    with span("pdf.image_encode") as current:
+        data, details = compress_page(image)
+        current.set(bytes=len(data), **details)
+    return {
+        "mime_type": f"image/{details['format'].lower()}",
+        "data": data
+    }
+
+
+def extract_text_layer(pdf_bytes, max_pages=PDF_MAX_PAGES):
+    """Return the embedded text of each page (up to max_pages), or None if the PDF cannot be parsed."""
+    try:
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        pages = reader.pages if max_pages is None else reader.pages[:max_pages]
+        return [page.extract_text() or "" for page in pages]
+    except Exception as e:
+        logger.warning("Could not read PDF text layer, falling back to rasterization: %s", e)
+        return None
+
+
+def has_usable_text_layer(page_texts):
+    """Decide whether extracted text is good enough to replace the page images."""
+    if not page_texts:
+        return False
+    text = "".join(page_texts)
+    stripped = "".join(text.split())
+    # Scanned documents have (almost) no text; broken font encodings produce mostly unprintable glyphs
+    if len(stripped) < MIN_TEXT_CHARS_PER_PAGE * len(page_texts):
+        return False
+    printable = sum(1 for char in stripped if char.isprintable() and char != "\ufffd")
+    return printable / len(stripped) >= MIN_TEXT_PRINTABLE_RATIO
+
+
+def text_part(page_texts):
+    """Wrap extracted page texts as a single plain-text part for the Gemini API."""
+    pages = [f"--- Page {number} ---\n{text.strip()}" for number, text in enumerate(page_texts, start=1)]
+    return "Resume text extracted from the uploaded PDF:\n\n" + "\n\n".join(pages)
+
+
+def input_pdf_setup(uploaded_file, max_pages=PDF_MAX_PAGES, dpi=RASTER_DPI, prefer_text=TEXT_FAST_PATH):
+    """Convert an uploaded PDF into Gemini parts: its text layer when usable, otherwise one image per page."""
+    if uploaded_file is not None:
+        with span("pdf.read") as current:
+            pdf_bytes = uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue") else uploaded_file.read()
+            current.set(bytes=len(pdf_bytes))
+        if prefer_text:
+            with span("pdf.text_layer") as current:
+                page_texts = extract_text_layer(pdf_bytes, max_pages=max_pages)
+                usable = has_usable_text_layer(page_texts)
+                current.set(pages=len(page_texts or []), usable=usable)
+            if usable:
+                return [text_part(page_texts)]
+        with span("pdf.rasterize", dpi=dpi) as current:
+            images = render_pages(pdf_bytes, last_page=max_pages, dpi=dpi)
+            current.set(pages=len(images))
+        with span("pdf.encode", pages=len(images)):
+            return [encode_page(image) for image in images]
+    else:
+        raise FileNotFoundError("No file uploaded")
@@ -0,0 +1,54 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_processing import input_pdf_setup
+from tracing import bind_context
+
+# Background conversion configuration (overridable through environment variables)
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", 2))
+PREPROCESS_MAX_ENTRIES = int(os.getenv("PREPROCESS_MAX_ENTRIES", 8))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_preprocess_executor():
+    """Return the worker pool shared by every session's background conversions."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS, thread_name_prefix="pdf-preprocess")
+    return _executor
+
+
+class PdfPreprocessor:
+    """Per-session memo of PDF conversions, keyed by content hash and started in the background.
+
+    submit() is called as soon as a file is uploaded; later prompt clicks call
+    it again with the same bytes and get the same future back, so the PDF is
+    converted once per session however many prompts are run against it.
+    """
+
+    def __init__(self, max_entries=PREPROCESS_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, pdf_bytes):
+        """Return a concurrent.futures.Future resolving to input_pdf_setup's parts for pdf_bytes."""
+        key = hashlib.sha256(pdf_bytes).hexdigest()
+        with self._lock:
+            future = self._futures.get(key)
+            # A failed or cancelled conversion is retried instead of being served from the memo
+            if future is None or future.cancelled() or (future.done() and future.exception() is not None):
+                future = get_preprocess_executor().submit(bind_context(input_pdf_setup), io.BytesIO(pdf_bytes))
+                self._futures[key] = future
+            self._futures.move_to_end(key)
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+            return future
@@ -1,51 +1,77 @@
 import os
 import streamlit as st
-import json
-import requests
 import time
+from contextlib import aclosing
+from runtime import dispatch_to_caller, get_session_id, run_async
+from http_client import AsyncHttpClient, CircuitBreaker, CircuitOpenError, DeadlineExceededError, HttpClientError
+from metrics_store import TASK_CODE_GENERATION, record_event
+from prompt_history import PromptHistory
+from tracing import current_span, span, traced
 
 # API endpoint for code generation
 url = os.getenv("API_URL")
 
 headers = {'Content-Type': 'application/json'}
 
-# Function to load session data
-def load_session_data():
-    """Load session state data from a JSON file, or initialize a new session state."""
-    if os.path.exists("session_data.json"):
-        try:
-            with open("session_data.json", "r") as f:
-                data = json.load(f)
-                # Load session state from file
-                st.session_state.chatbot_queries = data.get("chatbot_queries", 0)
-                st.session_state.code_prompts = data.get("code_prompts", 0)
-                st.session_state.total_chatbot_time = data.get("total_chatbot_time", 0.0)
-                st.session_state.total_code_time = data.get("total_code_time", 0.0)
-                st.session_state.response_times = data.get("response_times", [])
-        except (json.JSONDecodeError, FileNotFoundError):
-            st.error("Error loading session data: Invalid or missing JSON file.")
-            # Initialize session state if the file is invalid
-            st.session_state.chatbot_queries = 0
-            st.session_state.code_prompts = 0
-            st.session_state.total_chatbot_time = 0.0
-            st.session_state.total_code_time = 0.0
-            st.session_state.response_times = []
-    else:
-        # Initialize session state if the file does not exist
-        st.session_state.chatbot_queries = 0
-        st.session_state.code_prompts = 0
-        st.session_state.total_chatbot_time = 0.0
-        st.session_state.total_code_time = 0.0
-        st.session_state.response_times = []
-
-# Call the function when loading the Streamlit app
-load_session_data()
+# Shared pooled client for the LinguaLogic/Ollama backend: exponential backoff with jitter,
+# an overall deadline instead of 5 x 120 s blocking retries, and a breaker for a dead backend
+ollama_client = AsyncHttpClient(
+    deadline=float(os.getenv("CODE_GEN_DEADLINE_SECONDS", 180)),
+    attempt_timeout=120.0,
+    max_attempts=5,
+    breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60.0),
+    headers=headers
+)
+
+# Tell the user a retry is happening (runs on the Streamlit script thread)
+def warn_retry(attempt, max_attempts, error):
+    st.warning(f"Request failed ({error}), retrying {attempt}/{max_attempts - 1}...")
+
+# Async function to stream a generation from the API token by token
+async def stream_code_llama_async(data, on_token, session_id, language, on_retry=None):
+    """Consume the NDJSON token stream, calling on_token with the code so far.
+
+    Returns the final message with the full text under 'response'. An error
+    line from the server raises HttpClientError. Cancelling the coroutine
+    closes the connection and aborts the generation; time to first token and
+    total time are recorded either way.
+    """
+    start_time = time.perf_counter()
+    time_to_first_token = None
+    chunks = []
+    final_message = {}
+    completed = False
+    try:
+        with span("ollama.stream") as current:
+            async with aclosing(ollama_client.stream_json_lines(url, data, on_retry=on_retry)) as messages:
+                async for message in messages:
+                    if message.get("error"):
+                        # Ollama reports failures mid-stream as {"error": "..."} on a 200 response
+                        raise HttpClientError(f"Generation failed: {message['error']}")
+                    if message.get("response"):
+                        if time_to_first_token is None:
+                            time_to_first_token = round(time.perf_counter() - start_time, 2)
+                        chunks.append(message["response"])
+                        on_token("".join(chunks))
+                    if message.get("done"):
+                        final_message = message
+                        break
+            current.set(time_to_first_token=time_to_first_token, chunks=len(chunks))
+        completed = True
+        return {**final_message, "response": "".join(chunks)}
+    finally:
+        record_event(
+            TASK_CODE_GENERATION, round(time.perf_counter() - start_time, 2), session_id=session_id,
+            time_to_first_token=time_to_first_token, language=language, streamed=True, completed=completed
+        )
 
 # Synchronous function to generate a response from the API
-def run_code_llama(language, prompt):
+@traced("code.generation")
+def run_code_llama(language, prompt, on_token=None):
+    """Generate code for the prompt; when on_token is given the code is streamed to it as it arrives."""
     # Initialize session state variables
     if 'history' not in st.session_state:
-        st.session_state.history = []
+        st.session_state.history = PromptHistory()
     if 'response_times' not in st.session_state:
         st.session_state.response_times = []
     if 'total_code_time' not in st.session_state:
@@ -53,70 +79,59 @@ def run_code_llama(language, prompt):
     if 'code_prompts' not in st.session_state:
         st.session_state.code_prompts = 0  # Track how many code prompts have been done
 
-    # Add the new prompt to history
-    st.session_state.history.append(prompt)
-    if len(st.session_state.history) > 10:  # Limit history to the last 10 entries
-        st.session_state.history.pop(0)
-    
-    final_prompt = f"Language: {language}\n" + "\n".join(st.session_state.history)
-
-    data = {
-        "model": "LinguaLogic",
-        "prompt": final_prompt,
-        "stream": False
-    }
-
-    retry_attempts = 5
-    timeout_duration = 120  # Increase timeout to 2 minutes
-
-    for attempt in range(retry_attempts):
-        try:
-            start_time = time.time()  # Initialize start time here
-
-            response = requests.post(url, json=data, headers=headers, timeout=timeout_duration)
-            response.raise_for_status()  # Raise error for non-2xx statuses
-
-            response_data = response.json()
-
-            end_time = time.time()  # End timer
-            response_time = round(end_time - start_time, 2)
+    # Reuse the server context from the previous turn, or a token-budgeted history when there is none
+    history = st.session_state.history
+    current_span().set(language=language, streamed=on_token is not None)
 
-            # Update session state with timing data
-            st.session_state.response_times.append(response_time)
-            st.session_state.total_code_time += response_time
-            st.session_state.code_prompts += 1
-
-            save_session_data()
-
-            if 'response' in response_data:
-                return response_data['response']
-            else:
-                return "Error: Invalid API response format."
-
-        except requests.Timeout:
-            st.warning(f"Request timed out, retrying {attempt + 1}/{retry_attempts}...")
-            time.sleep(5)  # Wait before retrying
-
-        except requests.RequestException as e:
-            return f"API Error: {str(e)}"
-
-    return "API Error: Request timed out after multiple attempts."
-
-# Function to save session data
-def save_session_data():
-    """Save session state data to a JSON file for persistence."""
-    try:
+    with span("history.build") as current:
         data = {
-            "chatbot_queries": st.session_state.get('chatbot_queries', 0),
-            "code_prompts": st.session_state.get('code_prompts', 0),
-            "total_chatbot_time": st.session_state.get('total_chatbot_time', 0.0),
-            "total_code_time": st.session_state.get('total_code_time', 0.0),
-            "response_times": st.session_state.get('response_times', [])
+            "model": "LinguaLogic",
+            **history.build_request(language, prompt),
+            "stream": on_token is not None
         }
-        with open("session_data.json", "w") as f:
-            json.dump(data, f)
-    except Exception as e:
-        st.error(f"Error saving session data: {e}")
+        current.set(context_reused="context" in data, prompt_chars=len(data["prompt"]))
+
+    try:
+        start_time = time.time()  # Initialize start time here
+
+        if on_token is None:
+            with span("ollama.generate"):
+                response_data = run_async(ollama_client.post_json(url, data, on_retry=dispatch_to_caller(warn_retry)))
+        else:
+            response_data = run_async(stream_code_llama_async(
+                data, dispatch_to_caller(on_token), get_session_id(), language,
+                on_retry=dispatch_to_caller(warn_retry)
+            ))
+
+        end_time = time.time()  # End timer
+        response_time = round(end_time - start_time, 2)
+
+        # Update session state with timing data
+        st.session_state.response_times.append(response_time)
+        st.session_state.total_code_time += response_time
+        st.session_state.code_prompts += 1
+
+        # Streamed generations record their own timings, including time to first token
+        if on_token is None:
+            record_event(TASK_CODE_GENERATION, response_time, session_id=get_session_id(), language=language)
+
+        if response_data.get('error'):
+            return f"API Error: {response_data['error']}"
+        elif 'response' in response_data:
+            with span("history.record"):
+                history.record(prompt, response_data['response'], response_data.get('context'))
+            return response_data['response']
+        else:
+            return "Error: Invalid API response format."
+
+    except CircuitOpenError:
+        return "API Error: The code generation service is unavailable right now. Please try again shortly."
+
+    except DeadlineExceededError:
+        return "API Error: Request timed out after multiple attempts."
+
+    except (HttpClientError, ValueError) as e:
+        return f"API Error: {str(e)}"
 
 # Streamlit interface for standalone testing
 def code_generation_interface():
@@ -140,7 +155,7 @@ def code_generation_interface():
     # Button to clear the history (reset conversation)
     if st.button("Clear History"):
         # Clear session state history and reset timings
-        st.session_state.history = []
+        st.session_state.history = PromptHistory()
         st.session_state.response_times = []
         st.session_state.total_code_time = 0
         st.success("Session history cleared!")  # Notify the user that history was cleared
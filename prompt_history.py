@@ -0,0 +1,72 @@
+import math
+import os
+
+# Token budgets for code-generation history (overridable through environment variables)
+HISTORY_TOKEN_BUDGET = int(os.getenv("CODE_HISTORY_TOKEN_BUDGET", 1500))
+CONTEXT_TOKEN_LIMIT = int(os.getenv("CODE_CONTEXT_TOKEN_LIMIT", 3000))
+SUMMARY_LINE_CHARS = 160
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English text and code)."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+class PromptHistory:
+    """Token-bounded code-generation history that reuses the Ollama `context` between calls.
+
+    While the server-side context from the previous call is available and
+    under CONTEXT_TOKEN_LIMIT, only the new prompt is sent with that context,
+    so earlier turns are not re-processed. Otherwise the prompt is rebuilt
+    from the most recent turns that fit HISTORY_TOKEN_BUDGET, with older turns
+    compacted into a one-line-per-turn summary.
+    """
+
+    def __init__(self, token_budget=HISTORY_TOKEN_BUDGET, context_limit=CONTEXT_TOKEN_LIMIT):
+        self.token_budget = token_budget
+        self.context_limit = context_limit
+        self.turns = []
+        self.summary_lines = []
+        self.context = None
+
+    def __len__(self):
+        return len(self.turns)
+
+    def clear(self):
+        self.turns = []
+        self.summary_lines = []
+        self.context = None
+
+    @staticmethod
+    def _format_turn(turn):
+        return f"User: {turn['prompt']}\nAssistant: {turn['response']}"
+
+    def _compact(self):
+        """Move the oldest turns into the summary until the kept turns fit the budget."""
+        while len(self.turns) > 1 and sum(turn["tokens"] for turn in self.turns) > self.token_budget:
+            oldest = self.turns.pop(0)
+            self.summary_lines.append(" ".join(oldest["prompt"].split())[:SUMMARY_LINE_CHARS])
+        summary_budget = self.token_budget // 4
+        while self.summary_lines and estimate_tokens("\n".join(self.summary_lines)) > summary_budget:
+            self.summary_lines.pop(0)
+
+    def build_request(self, language, prompt):
+        """Return the Ollama request fields ('prompt' and, when reusable, 'context') for a new prompt."""
+        new_prompt = f"Language: {language}\n{prompt}"
+        if self.context and len(self.context) <= self.context_limit:
+            return {"prompt": new_prompt, "context": self.context}
+
+        parts = []
+        if self.summary_lines:
+            parts.append("Earlier requests:\n" + "\n".join(f"- {line}" for line in self.summary_lines))
+        parts.extend(self._format_turn(turn) for turn in self.turns)
+        parts.append(new_prompt)
+        return {"prompt": "\n\n".join(parts)}
+
+    def record(self, prompt, response, context=None):
+        """Store a finished turn and the server context returned with it."""
+        turn = {"prompt": prompt, "response": response}
+        turn["tokens"] = estimate_tokens(self._format_turn(turn))
+        self.turns.append(turn)
+        self.context = context or None
+        self._compact()
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Cache configuration (overridable through environment variables)
+CACHE_DB_PATH = os.getenv("RESULT_CACHE_DB", "result_cache.db")
+CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+MEMORY_CACHE_SIZE = int(os.getenv("RESULT_CACHE_MEMORY_SIZE", 256))
+DISK_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 5000))
+
+
+def normalize_job_description(job_description):
+    """Collapse whitespace so cosmetic edits to the job description still hit the cache."""
+    return re.sub(r"\s+", " ", job_description or "").strip()
+
+
+def make_cache_key(pdf_bytes, job_description, prompt_label, model_name, conversion_settings=""):
+    """Build a content-addressed key from the PDF bytes, job description, prompt label and model.
+
+    conversion_settings identifies how the PDF was turned into model input, so
+    changing the page limit, DPI or image encoding does not reuse old answers.
+    """
+    digest = hashlib.sha256()
+    parts = (
+        hashlib.sha256(pdf_bytes).hexdigest(),
+        normalize_job_description(job_description),
+        prompt_label,
+        model_name,
+        conversion_settings,
+    )
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache: an in-process LRU in front of a persistent SQLite store."""
+
+    def __init__(self, db_path=CACHE_DB_PATH, ttl_seconds=CACHE_TTL_SECONDS,
+                 memory_size=MEMORY_CACHE_SIZE, max_entries=DISK_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                   key TEXT PRIMARY KEY,
+                   value TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results (last_access)")
+        self._conn.commit()
+
+    def _is_expired(self, created_at, now):
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def _remember(self, key, value, created_at):
+        """Insert into the in-memory LRU, evicting the least recently used entry when full."""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                value, created_at = row
+                if not self._is_expired(created_at, now):
+                    self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    self._remember(key, value, created_at)
+                    self._counters["disk_hits"] += 1
+                    return value
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._conn.commit()
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        """Store a value in both tiers and enforce TTL and size limits on disk."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """Drop expired rows, then the least recently used rows above max_entries."""
+        if self.ttl_seconds > 0:
+            self._conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def clear(self):
+        """Remove every cached result and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self):
+        """Return hit/miss counters and entry counts for the Analytics page."""
+        with self._lock:
+            (disk_entries,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hits": hits,
+                "lookups": lookups,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Return the process-wide result cache, creating it on first use."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+    return _result_cache
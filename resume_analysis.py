@@ -0,0 +1,250 @@
+import asyncio
+import functools
+import io
+import itertools
+import logging
+import time
+
+import streamlit as st
+
+from gemini_scheduler import (
+    PRIORITY_INTERACTIVE, estimate_request_tokens, get_gemini_scheduler, is_rate_limited, request_key
+)
+from pdf_processing import conversion_settings, input_pdf_setup
+from result_cache import get_result_cache, make_cache_key
+from runtime import dispatch_to_caller, get_gemini_model
+from structured_output import cache_label, generation_config, is_structured, parse_structured_response, structured_prompt
+from tracing import bind_context, current_span, span
+
+# Gemini model used for resume analysis (also part of the result cache key)
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+
+# Returned when the model produced no usable text; never cached
+NO_TEXT_GENERATED = "No text generated"
+
+# Appended to a stream that failed part-way; such responses are shown but never cached
+RESPONSE_INCOMPLETE = "\n\n*(Response incomplete: generation stopped early.)*"
+
+logger = logging.getLogger(__name__)
+
+
+def analysis_cache_key(pdf_bytes, input_text, prompt):
+    """Result cache key for one analysis; structured labels are keyed by their schema version."""
+    return make_cache_key(pdf_bytes, input_text, cache_label(prompt), GEMINI_MODEL_NAME, conversion_settings())
+
+
+def is_cacheable(prompt, response):
+    """Never cache the no-text fallback, a truncated stream or a structured answer that failed validation."""
+    if response == NO_TEXT_GENERATED or response.endswith(RESPONSE_INCOMPLETE):
+        return False
+    return not is_structured(prompt) or parse_structured_response(prompt, response) is not None
+
+
+async def get_gemini_response_async(input_text, pdf_content, prompt, priority=PRIORITY_INTERACTIVE):
+    """Get a response from the Google Gemini AI model asynchronously.
+
+    The call goes through the process-wide scheduler, which enforces the
+    RPM/TPM quota, retries 429s and shares one call between identical
+    concurrent requests. Labels with a schema are answered as JSON.
+    """
+    try:
+        model = get_gemini_model(GEMINI_MODEL_NAME)
+        options = {}
+        if is_structured(prompt):
+            options["generation_config"] = generation_config(prompt)
+            prompt = structured_prompt(prompt)
+        contents = [input_text, *pdf_content, prompt]
+        response = await get_gemini_scheduler().run(
+            functools.partial(model.generate_content, contents, **options),
+            cost=estimate_request_tokens(contents), priority=priority,
+            key=request_key(GEMINI_MODEL_NAME, contents),
+        )
+        return response.candidates[0].content.parts[0].text
+    except (KeyError, IndexError, AttributeError) as e:
+        dispatch_to_caller(st.error)(f"Error generating response: {e}")
+        return NO_TEXT_GENERATED
+
+
+async def stream_gemini_response_async(input_text, pdf_content, prompt, on_chunk, priority=PRIORITY_INTERACTIVE):
+    """Stream a Gemini response, calling on_chunk with the text received so far.
+
+    The blocking SDK iterator runs on a worker thread and hands chunks to the
+    event loop through a queue, holding a scheduler slot for the whole stream;
+    a 429 before the first chunk is retried. A stream that fails after some
+    text arrived returns that text ending in RESPONSE_INCOMPLETE. Time to
+    first token and total generation time are logged separately.
+    """
+    loop = asyncio.get_running_loop()
+    scheduler = get_gemini_scheduler()
+    contents = [input_text, *pdf_content, prompt]
+    finished = object()
+
+    def produce_chunks(queue):
+        try:
+            model = get_gemini_model(GEMINI_MODEL_NAME)
+            for chunk in model.generate_content(contents, stream=True):
+                loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+    start_time = time.perf_counter()
+    chunks = []
+    time_to_first_token = None
+
+    for attempt in itertools.count():
+        error = None
+        async with scheduler.reserve(estimate_request_tokens(contents), priority):
+            queue = asyncio.Queue()
+            producer = scheduler.call(produce_chunks, queue)
+            while (item := await queue.get()) is not finished:
+                if isinstance(item, Exception):
+                    error = item
+                    continue
+                if time_to_first_token is None:
+                    time_to_first_token = time.perf_counter() - start_time
+                chunks.append(item)
+                on_chunk("".join(chunks))
+            await producer
+        if error is not None and is_rate_limited(error) and not chunks:
+            await scheduler.backoff(error, attempt)
+            continue
+        break
+
+    if error is not None:
+        if not isinstance(error, (KeyError, IndexError, AttributeError, ValueError)):
+            raise error
+        dispatch_to_caller(st.error)(f"Error generating response: {error}")
+        if not chunks:
+            return NO_TEXT_GENERATED
+        current_span().set(incomplete=True)
+        chunks.append(RESPONSE_INCOMPLETE)
+
+    current_span().set(time_to_first_token=time_to_first_token)
+    logger.info(
+        "Gemini stream for %r: first token %.2fs, total %.2fs",
+        prompt, time_to_first_token or 0.0, time.perf_counter() - start_time
+    )
+    return "".join(chunks)
+
+
+async def convert_pdf_async(pdf_bytes, executor=None, converted=None):
+    """Return the Gemini parts for a PDF, reusing a background conversion when one is given.
+
+    converted is a concurrent.futures.Future already converting pdf_bytes (see
+    PdfPreprocessor); it is shielded so a cancelled analysis leaves it running
+    for the next prompt.
+    """
+    with span("pdf.convert", bytes=len(pdf_bytes), preprocessed=converted is not None) as current:
+        if converted is not None:
+            current.set(ready=converted.done())
+            return await asyncio.shield(asyncio.wrap_future(converted))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, bind_context(input_pdf_setup), io.BytesIO(pdf_bytes))
+
+
+async def analyze_resume_async(pdf_bytes, input_text, prompt, executor=None, semaphore=None, on_chunk=None,
+                               converted=None, priority=PRIORITY_INTERACTIVE):
+    """Analyze one resume, serving repeats from the result cache.
+
+    The PDF is only converted on a cache miss, on `executor` when given, unless
+    a `converted` future from the background preprocessor is passed. When a
+    semaphore is passed it bounds the number of concurrent Gemini calls. When
+    on_chunk is passed the response is streamed to it as it is generated.
+    priority orders the call in the Gemini scheduler (batch work passes
+    PRIORITY_BATCH so interactive clicks go first). Structured labels are
+    never streamed, since partial JSON is not worth showing.
+    """
+    if is_structured(prompt):
+        on_chunk = None
+    result_cache = get_result_cache()
+    with span("cache.lookup") as current:
+        cache_key = analysis_cache_key(pdf_bytes, input_text, prompt)
+        response = result_cache.get(cache_key)
+        current.set(hit=response is not None)
+    if response is not None:
+        return response
+
+    pdf_content = await convert_pdf_async(pdf_bytes, executor, converted)
+
+    async def generate():
+        with span("gemini.generate", model=GEMINI_MODEL_NAME, prompt=prompt, streamed=on_chunk is not None) as current:
+            if on_chunk is not None:
+                response = await stream_gemini_response_async(input_text, pdf_content, prompt, on_chunk, priority)
+            else:
+                response = await get_gemini_response_async(input_text, pdf_content, prompt, priority)
+            current.set(response_chars=len(response))
+            return response
+
+    if semaphore is None:
+        response = await generate()
+    else:
+        with span("gemini.queue_wait"):
+            await semaphore.acquire()
+        try:
+            response = await generate()
+        finally:
+            semaphore.release()
+
+    if is_cacheable(prompt, response):
+        with span("cache.store"):
+            result_cache.set(cache_key, response)
+    return response
+
+
+async def analyze_all_prompts_async(pdf_bytes, input_text, prompts, on_result=None, converted=None, semaphore=None):
+    """Run every prompt against one resume concurrently and return {prompt: response}.
+
+    Cached prompts are answered immediately; the PDF is converted at most once
+    (or taken from the `converted` background future) and that payload is
+    shared by all remaining Gemini calls. on_result, if given, is called with
+    (prompt, response) as each answer lands. A prompt that fails is answered
+    with its error message (and not cached) while the others carry on. When a
+    semaphore is passed it bounds the number of concurrent Gemini calls.
+    """
+    result_cache = get_result_cache()
+    cache_keys = {prompt: analysis_cache_key(pdf_bytes, input_text, prompt) for prompt in prompts}
+    responses = {}
+    pending = []
+
+    for prompt in prompts:
+        cached = result_cache.get(cache_keys[prompt])
+        if cached is None:
+            pending.append(prompt)
+            continue
+        responses[prompt] = cached
+        if on_result is not None:
+            on_result(prompt, cached)
+
+    if pending:
+        pdf_content = await convert_pdf_async(pdf_bytes, converted=converted)
+
+        async def generate(prompt):
+            with span("gemini.generate", model=GEMINI_MODEL_NAME, prompt=prompt, streamed=False):
+                return await get_gemini_response_async(input_text, pdf_content, prompt)
+
+        async def run_prompt(prompt):
+            # One failing prompt (quota included) must not throw away the sections that did finish
+            try:
+                if semaphore is None:
+                    return prompt, await generate(prompt), False
+                with span("gemini.queue_wait"):
+                    await semaphore.acquire()
+                try:
+                    return prompt, await generate(prompt), False
+                finally:
+                    semaphore.release()
+            except Exception as e:
+                logger.warning("Prompt %r failed during Run All: %s", prompt, e)
+                return prompt, f"Error generating response: {e}", True
+
+        for finished in asyncio.as_completed([run_prompt(prompt) for prompt in pending]):
+            prompt, response, failed = await finished
+            if not failed and is_cacheable(prompt, response):
+                result_cache.set(cache_keys[prompt], response)
+            responses[prompt] = response
+            if on_result is not None:
+                on_result(prompt, response)
+
+    return {prompt: responses[prompt] for prompt in prompts}
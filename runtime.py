@@ -0,0 +1,150 @@
+import asyncio
+import contextvars
+import os
+import queue
+import threading
+
+# Size of the shared HTTP connection pool (per host)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+
+_lock = threading.Lock()
+_loop = None
+_genai_configured = False
+_models = {}
+_http_session = None
+
+# Queue of UI callbacks owned by the thread currently waiting in run_async
+_caller_queue = contextvars.ContextVar("caller_queue", default=None)
+# Posted to the caller queue when the coroutine ends; without it run_async only noticed
+# completion at its next 50 ms poll, adding up to 50 ms to every call
+_FINISHED = object()
+
+
+def _run_loop_forever(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_event_loop():
+    """Return the process-wide event loop, running on a long-lived daemon thread."""
+    global _loop
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=_run_loop_forever, args=(loop,), name="runtime-event-loop", daemon=True
+                ).start()
+                _loop = loop
+    return _loop
+
+
+def dispatch_to_caller(callback):
+    """Wrap a callback so that, inside run_async, it runs on the thread that called run_async.
+
+    Streamlit elements can only be updated from the script thread, while
+    coroutines run on the shared loop thread. Outside run_async the callback
+    is simply called directly.
+    """
+    def dispatch(*args, **kwargs):
+        caller_queue = _caller_queue.get()
+        if caller_queue is None:
+            return callback(*args, **kwargs)
+        caller_queue.put((callback, args, kwargs))
+    return dispatch
+
+
+def run_async(coro):
+    """Run a coroutine on the shared event loop and block until it finishes.
+
+    Callbacks wrapped with dispatch_to_caller are executed on the calling thread
+    while it waits, so Streamlit placeholders can be updated as results arrive.
+    The coroutine posts _FINISHED when it ends, so the caller returns at once
+    rather than at its next poll.
+    """
+    caller_queue = queue.SimpleQueue()
+    caller_context = contextvars.copy_context()
+
+    async def run_with_caller_queue():
+        # Carry the caller's context variables (e.g. the open trace span) into the coroutine
+        for var, value in caller_context.items():
+            var.set(value)
+        _caller_queue.set(caller_queue)
+        try:
+            return await coro
+        finally:
+            # Wake the caller as soon as the coroutine is done instead of at its next poll
+            caller_queue.put(_FINISHED)
+
+    future = asyncio.run_coroutine_threadsafe(run_with_caller_queue(), get_event_loop())
+    try:
+        while not future.done():
+            try:
+                item = caller_queue.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if item is _FINISHED:
+                break
+            callback, args, kwargs = item
+            callback(*args, **kwargs)
+        while not caller_queue.empty():
+            item = caller_queue.get_nowait()
+            if item is not _FINISHED:
+                callback, args, kwargs = item
+                callback(*args, **kwargs)
+        return future.result()
+    except BaseException:
+        # e.g. Streamlit stopping the script mid-run: don't leave the coroutine running
+        future.cancel()
+        raise
+
+
+def configure_genai():
+    """Configure the Gemini SDK once per process."""
+    global _genai_configured
+    if not _genai_configured:
+        import google.generativeai as genai  # Imported on first use; it dominates cold start otherwise
+
+        with _lock:
+            if not _genai_configured:
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                _genai_configured = True
+
+
+def get_gemini_model(model_name):
+    """Return a cached GenerativeModel so its client and connections are shared across sessions."""
+    model = _models.get(model_name)
+    if model is None:
+        configure_genai()
+        with _lock:
+            model = _models.get(model_name)
+            if model is None:
+                import google.generativeai as genai
+
+                model = _models[model_name] = genai.GenerativeModel(model_name)
+    return model
+
+
+def get_http_session():
+    """Return a process-wide requests.Session that keeps connections alive between calls."""
+    global _http_session
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        with _lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def get_session_id():
+    """Return the current Streamlit session id, or None outside a Streamlit script run."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
@@ -0,0 +1,254 @@
+import argparse
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import tempfile
+import threading
+import zlib
+from collections import Counter, defaultdict
+
+import numpy as np
+
+import corpus
+
+# Embedding backend: "hashing" (no model download, works offline) or "huggingface"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "hashing")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+HASHING_DIM = 512
+
+# BM25 parameters and hybrid fusion settings
+BM25_K1 = 1.5
+BM25_B = 0.75
+CANDIDATES_PER_RETRIEVER = 50
+RRF_K = 60
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[._+#-][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or the this to what when where which "
+    "who why with you your".split()
+)
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords; keeps tokens like node.js, c++ and v-model."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class HashingEmbedder:
+    """Feature-hashed unigram+bigram embeddings: deterministic, dependency-free and offline.
+
+    bigram_weight below 1 makes word order count for less than the words themselves.
+    """
+
+    def __init__(self, dim=HASHING_DIM, bigram_weight=1.0):
+        self.dim = dim
+        self.bigram_weight = bigram_weight
+        self.name = f"hashing-{dim}" if bigram_weight == 1.0 else f"hashing-{dim}-bigrams{bigram_weight:g}"
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = [(token, 1.0) for token in tokens]
+            features += [(f"{a} {b}", self.bigram_weight) for a, b in zip(tokens, tokens[1:])]
+            for feature, weight in features:
+                digest = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, digest % self.dim] += weight if digest & 0x80000000 else -weight
+        return _normalize_rows(matrix)
+
+
+class HuggingFaceEmbedder:
+    """Sentence-transformer embeddings through langchain-huggingface."""
+
+    def __init__(self, model_name=EMBEDDING_MODEL):
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        self._model = HuggingFaceEmbeddings(model_name=model_name)
+        self.name = f"huggingface:{model_name}"
+
+    def embed(self, texts):
+        return _normalize_rows(np.asarray(self._model.embed_documents(list(texts)), dtype=np.float32))
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """Return the process-wide embedder selected by EMBEDDING_BACKEND."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = HuggingFaceEmbedder() if EMBEDDING_BACKEND == "huggingface" else HashingEmbedder()
+    return _embedder
+
+
+class HybridIndex:
+    """BM25 inverted index plus a memory-mapped embedding matrix for one corpus source."""
+
+    def __init__(self, index_dir, chunks):
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(index_dir, "postings.json"), encoding="utf-8") as f:
+            raw_postings = json.load(f)
+        self.chunks = chunks
+        self.doc_lengths = np.asarray(self.meta["doc_lengths"], dtype=np.float32)
+        self.average_length = float(self.doc_lengths.mean()) if len(self.doc_lengths) else 0.0
+        self.postings = {
+            term: (np.asarray(doc_ids, dtype=np.int32), np.asarray(freqs, dtype=np.float32))
+            for term, (doc_ids, freqs) in raw_postings.items()
+        }
+        self.embeddings = np.load(os.path.join(index_dir, "embeddings.npy"), mmap_mode="r")
+        # Precompute the BM25 length normalization once per document
+        self._length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / max(self.average_length, 1e-9))
+
+    def bm25_scores(self, query_tokens):
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        document_count = len(self.chunks)
+        for token in set(query_tokens):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            doc_ids, freqs = posting
+            idf = math.log(1 + (document_count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            scores[doc_ids] += idf * freqs * (BM25_K1 + 1) / (freqs + self._length_norm[doc_ids])
+        return scores
+
+    def vector_scores(self, query_text):
+        query_vector = get_embedder().embed([query_text])[0]
+        return self.embeddings @ query_vector
+
+    @staticmethod
+    def _top(scores, count):
+        count = min(count, len(scores))
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.argpartition(-scores, count - 1)[:count]
+        return candidates[np.argsort(-scores[candidates])]
+
+    def search(self, query, k=5):
+        """Return the k best chunks by reciprocal-rank fusion of BM25 and cosine similarity."""
+        if not self.chunks:
+            return []
+        bm25 = self.bm25_scores(tokenize(query))
+        cosine = self.vector_scores(query)
+        fused = defaultdict(float)
+        for ranking, scores in ((self._top(bm25, CANDIDATES_PER_RETRIEVER), bm25),
+                                (self._top(cosine, CANDIDATES_PER_RETRIEVER), cosine)):
+            for rank, doc_id in enumerate(ranking):
+                if scores[doc_id] > 0:
+                    fused[int(doc_id)] += 1.0 / (RRF_K + rank + 1)
+        best = sorted(fused.items(), key=lambda item: -item[1])[:k]
+        return [{**self.chunks[doc_id], "score": score} for doc_id, score in best]
+
+
+def _index_dir(source, version):
+    return os.path.join(corpus.CORPUS_DIR, source, f"index-v{version}")
+
+
+def build_index(source):
+    """Build the BM25 postings and embedding matrix for the source's current snapshot."""
+    manifest = corpus.ensure_snapshot(source)
+    chunks = corpus.load_chunks(source)
+    texts = [f"{chunk['heading']}\n{chunk['text']}" for chunk in chunks]
+    embedder = get_embedder()
+
+    postings = defaultdict(lambda: ([], []))
+    doc_lengths = []
+    for doc_id, text in enumerate(texts):
+        tokens = tokenize(text)
+        doc_lengths.append(len(tokens))
+        for term, freq in Counter(tokens).items():
+            postings[term][0].append(doc_id)
+            postings[term][1].append(freq)
+
+    index_dir = _index_dir(source, manifest["version"])
+    source_dir = os.path.dirname(index_dir)
+    # A private hidden staging dir, so concurrent builders (a background refresh and the CLI) never share one
+    tmp_dir = tempfile.mkdtemp(dir=source_dir, prefix=".index-")
+    try:
+        embeddings = embedder.embed(texts) if texts else np.zeros((0, 1), dtype=np.float32)
+        np.save(os.path.join(tmp_dir, "embeddings.npy"), embeddings)
+        with open(os.path.join(tmp_dir, "postings.json"), "w", encoding="utf-8") as f:
+            json.dump(postings, f)
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"source": source, "corpus_version": manifest["version"], "embedder": embedder.name,
+                       "doc_lengths": doc_lengths}, f)
+        shutil.rmtree(index_dir, ignore_errors=True)
+        try:
+            os.replace(tmp_dir, index_dir)
+        except OSError:
+            # Another builder installed this version in the meantime; its index is the same
+            if not os.path.exists(os.path.join(index_dir, "meta.json")):
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Remove indexes of older snapshot versions (staging dirs are dot-prefixed and never match)
+    for name in os.listdir(source_dir):
+        if name.startswith("index-v") and os.path.join(source_dir, name) != index_dir:
+            shutil.rmtree(os.path.join(source_dir, name), ignore_errors=True)
+    logger.info("Built %s index for corpus version %d (%d chunks)", source, manifest["version"], len(chunks))
+    return index_dir
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def load_index(source):
+    """Return the source's index, building it if it is missing, stale or made by another embedder."""
+    manifest = corpus.ensure_snapshot(source)
+    cache_key = (source, manifest["version"])
+    index = _indexes.get(cache_key)
+    if index is not None:
+        return index
+    with _indexes_lock:
+        index = _indexes.get(cache_key)
+        if index is None:
+            index_dir = _index_dir(source, manifest["version"])
+            meta_path = os.path.join(index_dir, "meta.json")
+            needs_build = not os.path.exists(meta_path)
+            if not needs_build:
+                with open(meta_path, encoding="utf-8") as f:
+                    needs_build = json.load(f)["embedder"] != get_embedder().name
+            if needs_build:
+                build_index(source)
+            index = _indexes[cache_key] = HybridIndex(index_dir, corpus.load_chunks(source))
+    return index
+
+
+def search(source, query, k=5):
+    """Return the k most relevant chunks of a source for the query."""
+    return load_index(source).search(query, k=k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the hybrid search index for the interview corpus.")
+    parser.add_argument("sources", nargs="*", help=f"sources to index (default: all of {', '.join(corpus.CORPUS_SOURCES)})")
+    args = parser.parse_args()
+    unknown = set(args.sources) - set(corpus.CORPUS_SOURCES)
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    for source in args.sources or corpus.CORPUS_SOURCES:
+        print(f"{source}: {build_index(source)}")
+
+
+if __name__ == "__main__":
+    main()
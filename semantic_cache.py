@@ -0,0 +1,193 @@
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from search_index import HashingEmbedder, get_embedder, tokenize
+
+# Semantic cache configuration (overridable through environment variables)
+SEMANTIC_CACHE_DB = os.getenv("SEMANTIC_CACHE_DB", "semantic_cache.db")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.85))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+SEMANTIC_CACHE_MAX_PER_TOPIC = int(os.getenv("SEMANTIC_CACHE_MAX_PER_TOPIC", 1000))
+# Weight of word-pair features when questions are hashed: "props and state" asks the same as "state and props"
+SEMANTIC_CACHE_BIGRAM_WEIGHT = 0.5
+
+# Words that change how a question is phrased but not what it asks
+_FILLER_WORDS = frozenset(
+    "explain describe define definition meaning mean means tell me about please briefly concept concepts "
+    "give overview".split()
+)
+
+
+def _topic_words(topic):
+    words = set(tokenize(topic))
+    # "ReactJS" and "Vue.js" are usually written "React" and "Vue"
+    return words | {word.removesuffix("js").rstrip(".") for word in words}
+
+
+def question_text(topic, question):
+    """Reduce a question to the words that say what it asks, dropping filler and the topic's own name."""
+    ignored = _FILLER_WORDS | _topic_words(topic)
+    return " ".join(word for word in tokenize(question) if word not in ignored)
+
+
+class _TopicEntries:
+    """In-memory view of one topic's cached questions with a stacked embedding matrix."""
+
+    def __init__(self, dim):
+        self.ids = []
+        self.answers = []
+        self.created_at = []
+        self.last_access = []
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+
+    def append(self, entry_id, answer, vector, created_at, last_access):
+        self.ids.append(entry_id)
+        self.answers.append(answer)
+        self.created_at.append(created_at)
+        self.last_access.append(last_access)
+        self.matrix = np.vstack([self.matrix, vector[np.newaxis, :]])
+
+    def remove(self, positions):
+        positions = set(positions)
+        keep = [i for i in range(len(self.ids)) if i not in positions]
+        self.ids = [self.ids[i] for i in keep]
+        self.answers = [self.answers[i] for i in keep]
+        self.created_at = [self.created_at[i] for i in keep]
+        self.last_access = [self.last_access[i] for i in keep]
+        self.matrix = self.matrix[keep]
+
+
+class SemanticCache:
+    """Per-topic cache of chatbot answers looked up by embedding similarity of the question.
+
+    Entries persist in SQLite; each topic is loaded once into an embedding
+    matrix so a lookup is a single matrix-vector product. Questions are
+    embedded as their question_text, and with the hashing backend word order
+    counts for less, so rephrasings of the same question land together.
+    """
+
+    def __init__(self, db_path=SEMANTIC_CACHE_DB, threshold=SEMANTIC_CACHE_THRESHOLD,
+                 ttl_seconds=SEMANTIC_CACHE_TTL_SECONDS, max_per_topic=SEMANTIC_CACHE_MAX_PER_TOPIC):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_per_topic = max_per_topic
+        self.embedder = get_embedder()
+        if isinstance(self.embedder, HashingEmbedder):
+            self.embedder = HashingEmbedder(self.embedder.dim, bigram_weight=SEMANTIC_CACHE_BIGRAM_WEIGHT)
+        # Stored vectors are only comparable when made by the same embedder from the same question_text
+        self.embedder_name = f"{self.embedder.name}/question-text"
+        self._topics = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS answers (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   topic TEXT NOT NULL,
+                   embedder TEXT NOT NULL,
+                   question TEXT NOT NULL,
+                   answer TEXT NOT NULL,
+                   embedding BLOB NOT NULL,
+                   created_at REAL NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_topic ON answers (topic, embedder)")
+        self._conn.commit()
+
+    def _load_topic(self, topic):
+        entries = self._topics.get(topic)
+        if entries is None:
+            rows = self._conn.execute(
+                "SELECT id, answer, embedding, created_at, last_access FROM answers "
+                "WHERE topic = ? AND embedder = ? ORDER BY id",
+                (topic, self.embedder_name),
+            ).fetchall()
+            entries = None
+            for entry_id, answer, blob, created_at, last_access in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                if entries is None:
+                    entries = _TopicEntries(len(vector))
+                entries.append(entry_id, answer, vector, created_at, last_access)
+            self._topics[topic] = entries
+        return entries
+
+    def _expire(self, topic, entries, now):
+        if self.ttl_seconds <= 0 or entries is None:
+            return
+        expired = [i for i, created in enumerate(entries.created_at) if now - created > self.ttl_seconds]
+        if expired:
+            self._conn.executemany("DELETE FROM answers WHERE id = ?", [(entries.ids[i],) for i in expired])
+            self._conn.commit()
+            entries.remove(expired)
+
+    def get(self, topic, question):
+        """Return the cached answer to the most similar question above the threshold, or None."""
+        vector = self.embedder.embed([question_text(topic, question)])[0]
+        now = time.time()
+        with self._lock:
+            entries = self._load_topic(topic)
+            self._expire(topic, entries, now)
+            if entries is not None and entries.ids:
+                similarities = entries.matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entries.last_access[best] = now
+                    self._conn.execute("UPDATE answers SET last_access = ? WHERE id = ?", (now, entries.ids[best]))
+                    self._conn.commit()
+                    self._counters["hits"] += 1
+                    return entries.answers[best]
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, topic, question, answer):
+        """Store an answer, evicting the least recently used entries above the per-topic limit."""
+        vector = self.embedder.embed([question_text(topic, question)])[0]
+        now = time.time()
+        with self._lock:
+            entries = self._load_topic(topic)
+            cursor = self._conn.execute(
+                "INSERT INTO answers (topic, embedder, question, answer, embedding, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (topic, self.embedder_name, question, answer, vector.tobytes(), now, now),
+            )
+            if entries is None:
+                entries = self._topics[topic] = _TopicEntries(len(vector))
+            entries.append(cursor.lastrowid, answer, vector, now, now)
+
+            overflow = len(entries.ids) - self.max_per_topic
+            if overflow > 0:
+                oldest = sorted(range(len(entries.ids)), key=lambda i: entries.last_access[i])[:overflow]
+                self._conn.executemany("DELETE FROM answers WHERE id = ?", [(entries.ids[i],) for i in oldest])
+                entries.remove(oldest)
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters for the Analytics page."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "lookups": lookups,
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+                "entries": entries,
+            }
+
+
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """Return the process-wide semantic answer cache, creating it on first use."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticCache()
+    return _semantic_cache
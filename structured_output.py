@@ -0,0 +1,148 @@
+import json
+import logging
+import math
+import os
+import re
+
+# Structured output configuration (overridable through environment variables)
+STRUCTURED_OUTPUT_ENABLED = os.getenv("STRUCTURED_OUTPUT", "true").lower() == "true"
+
+# Bumped whenever a schema changes so cached responses in the old shape are not reused
+SCHEMA_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+_KEYWORDS = {"type": "ARRAY", "items": {"type": "STRING"}}
+
+
+def _schema(score_description, **extra_properties):
+    """A Gemini response schema: the shared scoring fields plus any prompt-specific ones."""
+    properties = {
+        "score": {"type": "NUMBER", "description": score_description},
+        "summary": {"type": "STRING", "description": "Two or three sentences justifying the score."},
+        "matched_keywords": {**_KEYWORDS, "description": "Skills and keywords from the job description found in the resume."},
+        "missing_keywords": {**_KEYWORDS, "description": "Important job description keywords absent from the resume."},
+        "red_flags": {**_KEYWORDS, "description": "Concerns such as gaps, inconsistencies or unmet hard requirements."},
+        **extra_properties,
+    }
+    return {"type": "OBJECT", "properties": properties, "required": list(properties)}
+
+
+# Prompt labels answered as JSON records instead of prose; every score is on a 0-100 scale
+SCHEMAS = {
+    "Percentage Match": _schema("Percentage (0-100) of the job description's requirements the resume meets."),
+    "Job Fit Score": _schema("Overall fit for the role from 0 (no fit) to 100 (ideal candidate)."),
+    "Candidate Ranking": _schema(
+        "Ranking score from 0 to 100 used to order candidates for this role.",
+        recommendation={"type": "STRING", "description": "One of: strong hire, hire, maybe, no hire."},
+    ),
+    "Keyword Frequency Analysis": _schema(
+        "Percentage (0-100) of the job description's keywords that appear in the resume.",
+        keyword_counts={
+            "type": "ARRAY",
+            "description": "How often each job description keyword appears in the resume.",
+            "items": {
+                "type": "OBJECT",
+                "properties": {"keyword": {"type": "STRING"}, "count": {"type": "INTEGER"}},
+                "required": ["keyword", "count"],
+            },
+        },
+    ),
+}
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def is_structured(prompt):
+    return STRUCTURED_OUTPUT_ENABLED and prompt in SCHEMAS
+
+
+def cache_label(prompt):
+    """The prompt part of the result cache key; structured answers never collide with cached prose."""
+    return f"{prompt} [json v{SCHEMA_VERSION}]" if is_structured(prompt) else prompt
+
+
+def structured_prompt(prompt):
+    """The prompt text sent to Gemini for a structured label."""
+    return (
+        f"{prompt}\n\nAnswer as a JSON object matching the response schema. Base every field on the resume "
+        "and job description above; use empty lists rather than inventing keywords or red flags."
+    )
+
+
+def generation_config(prompt):
+    """Gemini generation settings that constrain the response to the label's schema."""
+    return {"response_mime_type": "application/json", "response_schema": SCHEMAS[prompt]}
+
+
+def _coerce(schema, value):
+    kind = schema["type"]
+    if kind == "OBJECT":
+        if not isinstance(value, dict):
+            raise ValueError(f"expected an object, got {type(value).__name__}")
+        record = {}
+        for name, field in schema["properties"].items():
+            if value.get(name) is not None:
+                record[name] = _coerce(field, value[name])
+            elif name in schema.get("required", ()):
+                raise ValueError(f"missing field {name!r}")
+        return record
+    if kind == "ARRAY":
+        if not isinstance(value, list):
+            raise ValueError(f"expected a list, got {type(value).__name__}")
+        # Models sometimes pad lists with nulls; drop them rather than keeping the string 'None'
+        items = [_coerce(schema["items"], item) for item in value if item is not None]
+        if schema["items"]["type"] == "STRING":
+            # Drop blanks and case-insensitive duplicates, keeping the model's order
+            seen = set()
+            items = [item for item in items if item and not (item.lower() in seen or seen.add(item.lower()))]
+        return items
+    if kind in ("NUMBER", "INTEGER"):
+        number = float(str(value).strip().rstrip("%"))
+        if not math.isfinite(number):
+            raise ValueError(f"expected a finite number, got {value!r}")
+        return number if kind == "NUMBER" else int(number)
+    return str(value).strip()
+
+
+def parse_structured_response(prompt, response):
+    """Validate a structured response against its label's schema and return a compact record.
+
+    Returns None for labels without a schema and for responses that are not
+    valid JSON in the expected shape (those are shown as-is and not cached).
+    """
+    if not is_structured(prompt) or not isinstance(response, str):
+        return None
+    try:
+        record = _coerce(SCHEMAS[prompt], json.loads(_CODE_FENCE.sub("", response.strip())))
+        if not 0 <= record["score"] <= 100:
+            raise ValueError(f"score {record['score']} is outside 0-100")
+    except (ValueError, TypeError) as e:
+        logger.warning("Structured response for %r did not match its schema: %s", prompt, e)
+        return None
+    record["score"] = round(record["score"], 1)
+    return record
+
+
+def record_markdown(prompt, record):
+    """Render a structured record for display and reports."""
+    lines = [f"**Score:** {record['score']:g} / 100"]
+    if record.get("recommendation"):
+        lines.append(f"**Recommendation:** {record['recommendation']}")
+    lines.append("")
+    lines.append(record["summary"])
+    for title, field in (("Matched keywords", "matched_keywords"), ("Missing keywords", "missing_keywords"),
+                         ("Red flags", "red_flags")):
+        lines.append("")
+        lines.append(f"**{title}:** {', '.join(record[field]) if record[field] else 'none'}")
+    if record.get("keyword_counts"):
+        lines.append("")
+        lines.append("| Keyword | Count |\n| --- | --- |")
+        lines.extend(f"| {item['keyword']} | {item['count']} |" for item in record["keyword_counts"])
+    return "\n".join(lines)
+
+
+def response_markdown(prompt, response):
+    """Markdown for a response: structured records are rendered, anything else is returned unchanged."""
+    record = parse_structured_response(prompt, response)
+    return record_markdown(prompt, record) if record is not None else response
@@ -5,6 +5,7 @@ from agents import reactjs_agent, angular_agent, javascript_agent, vuejs_agent,
 # ReactJS Interview Preparation Task
 reactjs_task = Task(
     description=(
+        "Answer the user's question: {question}\n"
         "Prepare detailed answers and explanations for common ReactJS interview questions. "
         "Focus on breaking down complex concepts and providing clear guidance."
     ),
@@ -16,6 +17,7 @@ reactjs_task = Task(
 # Angular Interview Preparation Task
 angular_task = Task(
     description=(
+        "Answer the user's question: {question}\n"
         "Prepare detailed answers and explanations for common Angular interview questions. "
         "Focus on complex concepts and ensure clarity in the explanations."
     ),
@@ -27,6 +29,7 @@ angular_task = Task(
 # Vue.js Interview Preparation Task
 vuejs_task = Task(
     description=(
+        "Answer the user's question: {question}\n"
         "Prepare detailed answers and explanations for common Vue.js interview questions. "
         "Highlight key concepts and provide clear guidance for interview preparation."
     ),
@@ -38,6 +41,7 @@ vuejs_task = Task(
 # JavaScript Interview Preparation Task
 javascript_task = Task(
     description=(
+        "Answer the user's question: {question}\n"
         "Prepare detailed answers and explanations for common JavaScript interview questions. "
         "Cover fundamental concepts as well as advanced topics relevant to interviews."
     ),
@@ -49,6 +53,7 @@ javascript_task = Task(
 # Full Stack Developer Interview Preparation Task
 fullstack_task = Task(
     description=(
+        "Answer the user's question: {question}\n"
         "Prepare comprehensive answers and explanations for Full Stack Developer interview questions. "
         "Cover both frontend and backend topics, including web development, databases, APIs, and deployment strategies."
     ),
@@ -60,6 +65,7 @@ fullstack_task = Task(
 # Data Science Interview Preparation Task
 datascience_task = Task(
     description=(
+        "Answer the user's question: {question}\n"
         "Prepare detailed answers and explanations for Data Science interview questions. "
         "Focus on algorithms, statistical methods, machine learning, and real-world applications."
     ),
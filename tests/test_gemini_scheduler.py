@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import gemini_scheduler
+from gemini_scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, GeminiQuotaError, GeminiScheduler
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+def make_scheduler(**options):
+    options = {"rpm": 60000, "tpm": 10 ** 9, **options}
+    return GeminiScheduler(**options)
+
+
+def blocking_call(name, calls, duration=0.05, gate=None):
+    def function():
+        if gate is not None:
+            gate.wait(5)
+        time.sleep(duration)
+        calls.append(name)
+        return name
+    return function
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(gemini_scheduler, "GEMINI_BACKOFF_BASE", 0.05)
+    monkeypatch.setattr(gemini_scheduler, "GEMINI_MAX_RETRIES", 3)
+
+
+def test_identical_concurrent_requests_share_one_call():
+    scheduler = make_scheduler()
+    calls = []
+
+    async def main():
+        return await asyncio.gather(*(
+            scheduler.run(blocking_call("shared", calls, 0.1), 10, key="same") for _ in range(5)
+        ))
+
+    assert asyncio.run(main()) == ["shared"] * 5
+    assert calls == ["shared"]
+    assert scheduler.counters["coalesced"] == 4
+
+
+def test_cancelling_a_coalesced_caller_keeps_the_shared_call():
+    scheduler = make_scheduler()
+    calls = []
+
+    async def main():
+        leader = asyncio.create_task(scheduler.run(blocking_call("shared", calls, 0.1), 10, key="same"))
+        follower = asyncio.create_task(scheduler.run(blocking_call("shared", calls, 0.1), 10, key="same"))
+        await asyncio.sleep(0.02)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "shared"
+    assert calls == ["shared"]
+
+
+def test_interactive_requests_are_admitted_before_queued_batch_work():
+    scheduler = make_scheduler(max_concurrency=1)
+    calls = []
+
+    async def main():
+        busy = asyncio.create_task(scheduler.run(blocking_call("busy", calls, 0.2), 10))
+        await asyncio.sleep(0.05)
+        queued = [asyncio.create_task(scheduler.run(blocking_call(f"batch{i}", calls), 10, PRIORITY_BATCH))
+                  for i in range(2)]
+        await asyncio.sleep(0.01)
+        queued.append(asyncio.create_task(scheduler.run(blocking_call("click", calls), 10, PRIORITY_INTERACTIVE)))
+        await asyncio.gather(busy, *queued)
+
+    asyncio.run(main())
+    assert calls == ["busy", "click", "batch0", "batch1"]
+
+
+def test_interactive_caller_promotes_a_queued_batch_leader():
+    scheduler = make_scheduler(max_concurrency=1)
+    calls = []
+
+    async def main():
+        busy = asyncio.create_task(scheduler.run(blocking_call("busy", calls, 0.2), 10))
+        await asyncio.sleep(0.05)
+        batch = asyncio.create_task(scheduler.run(blocking_call("batch", calls), 10, PRIORITY_BATCH))
+        await asyncio.sleep(0.01)
+        leader = asyncio.create_task(scheduler.run(blocking_call("shared", calls), 10, PRIORITY_BATCH, key="k"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(scheduler.run(blocking_call("shared", calls), 10, PRIORITY_INTERACTIVE, key="k"))
+        await asyncio.gather(busy, batch, leader, follower)
+
+    asyncio.run(main())
+    assert calls == ["busy", "shared", "batch"]
+
+
+def test_cancelling_while_queued_never_runs_the_call_or_leaks_its_slot():
+    scheduler = make_scheduler(max_concurrency=1)
+    calls = []
+
+    async def main():
+        busy = asyncio.create_task(scheduler.run(blocking_call("busy", calls, 0.2), 1))
+        await asyncio.sleep(0.02)
+        queued = asyncio.create_task(scheduler.run(blocking_call("cancelled", calls), 1))
+        await asyncio.sleep(0.02)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        after = await scheduler.run(blocking_call("after", calls), 1)
+        await busy
+        return after
+
+    assert asyncio.run(main()) == "after"
+    assert calls == ["busy", "after"]
+    assert scheduler._in_flight == 0
+
+
+def test_rate_limited_calls_back_off_and_retry():
+    scheduler = make_scheduler()
+    attempts = []
+    pauses = []
+    pause = scheduler.pause
+    scheduler.pause = lambda seconds: (pauses.append(seconds), pause(seconds))
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise RateLimited("429 Resource has been exhausted")
+        return "ok"
+
+    assert asyncio.run(scheduler.run(flaky, 10)) == "ok"
+    assert len(attempts) == 3
+    assert scheduler.counters["rate_limited"] == 2
+    # Exponential backoff with jitter: about 0.05s, then about 0.1s
+    assert 0.0375 <= pauses[0] <= 0.0625 and 0.075 <= pauses[1] <= 0.125
+    assert attempts[1] - attempts[0] >= pauses[0] * 0.9
+
+
+def test_rate_limits_beyond_the_retry_budget_raise_quota_error():
+    scheduler = make_scheduler()
+
+    def always_limited():
+        raise RateLimited("429")
+
+    with pytest.raises(GeminiQuotaError):
+        asyncio.run(scheduler.run(always_limited, 10))
+    assert scheduler.counters["rate_limited"] == gemini_scheduler.GEMINI_MAX_RETRIES + 1
+
+
+def test_other_errors_are_not_retried():
+    scheduler = make_scheduler()
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.run(broken, 10))
+    assert attempts == [1]
+
+
+def test_cold_start_burst_is_a_fraction_of_the_minute_quota():
+    # 600 RPM refills 10 requests a second; only 10% of the minute's quota may go out at once
+    scheduler = GeminiScheduler(rpm=600, tpm=10 ** 9, burst_fraction=0.1)
+    admitted_at = []
+
+    async def main():
+        start = time.monotonic()
+        await asyncio.gather(*(scheduler.run(lambda: admitted_at.append(time.monotonic() - start), 1)
+                               for _ in range(70)))
+
+    asyncio.run(main())
+    admitted_at.sort()
+    assert admitted_at[59] < 0.5
+    assert admitted_at[69] >= 0.9
+
+
+def test_calls_run_on_the_scheduler_threads():
+    scheduler = make_scheduler(max_concurrency=2)
+    names = asyncio.run(scheduler.run(lambda: threading.current_thread().name, 1))
+    assert names.startswith("gemini-call")
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from http_client import AsyncHttpClient, CircuitBreaker, HttpClientError
+
+
+async def serve(handle_body):
+    """Start a raw HTTP server that answers every request with 200 headers, then hands the writer to handle_body."""
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        try:
+            await handle_body(writer)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+
+
+async def stalled_json(writer):
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 20\r\n\r\n{\"response\":")
+    await writer.drain()
+    await asyncio.sleep(5)
+
+
+async def truncated_json(writer):
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 100\r\n\r\n{\"response\":")
+    await writer.drain()
+
+
+def make_client():
+    return AsyncHttpClient(deadline=2.0, attempt_timeout=0.3, max_attempts=2, backoff_base=0.01,
+                           breaker=CircuitBreaker(failure_threshold=10))
+
+
+def run_against(handle_body, call):
+    """Run call(client, url) against a stub server and return the client."""
+    client = make_client()
+
+    async def main():
+        server, url = await serve(handle_body)
+        try:
+            async with server:
+                await call(client, url)
+        finally:
+            await client.close()
+
+    asyncio.run(main())
+    return client
+
+
+@pytest.mark.parametrize("handle_body", [stalled_json, truncated_json])
+def test_post_json_body_failures_are_retried_then_raise_http_client_error(handle_body):
+    async def call(client, url):
+        with pytest.raises(HttpClientError):
+            await client.post_json(url, {})
+
+    client = run_against(handle_body, call)
+    assert client.breaker._failures == 2
+
+
+async def stalled_stream(writer):
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n")
+    line = b'{"response": "def "}\n'
+    writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+    await writer.drain()
+    await asyncio.sleep(5)
+
+
+async def truncated_stream(writer):
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n")
+    line = b'{"response": "def "}\n'
+    writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+    await writer.drain()
+
+
+@pytest.mark.parametrize("handle_body", [stalled_stream, truncated_stream])
+def test_broken_streams_raise_http_client_error_after_the_lines_received(handle_body):
+    received = []
+
+    async def call(client, url):
+        with pytest.raises(HttpClientError):
+            async for message in client.stream_json_lines(url, {}):
+                received.append(message)
+
+    client = run_against(handle_body, call)
+    assert received == [{"response": "def "}]
+    assert client.breaker._failures == 1
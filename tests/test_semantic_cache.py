@@ -0,0 +1,37 @@
+import pytest
+
+from semantic_cache import SemanticCache, question_text
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticCache(db_path=str(tmp_path / "semantic_cache.db"))
+
+
+@pytest.mark.parametrize("asked, rephrased", [
+    ("what is the virtual DOM", "explain virtual DOM in React"),
+    ("difference between props and state", "difference between state and props"),
+])
+def test_rephrased_questions_hit(cache, asked, rephrased):
+    cache.set("ReactJS", asked, "answer")
+    assert cache.get("ReactJS", rephrased) == "answer"
+
+
+def test_different_questions_miss(cache):
+    cache.set("ReactJS", "what is the virtual DOM", "answer")
+    assert cache.get("ReactJS", "what is the shadow DOM") is None
+    assert cache.get("Angular", "what is the virtual DOM") is None
+
+
+def test_question_text_drops_filler_and_topic_name():
+    assert question_text("ReactJS", "Explain the virtual DOM in React") == "virtual dom"
+    assert question_text("Vue.js", "What is a computed property in Vue?") == "computed property"
+
+
+def test_entries_past_the_topic_limit_are_evicted(tmp_path):
+    cache = SemanticCache(db_path=str(tmp_path / "semantic_cache.db"), max_per_topic=2)
+    for number, question in enumerate(["what are hooks", "what is jsx", "what are portals"]):
+        cache.set("ReactJS", question, f"answer {number}")
+    assert cache.get("ReactJS", "what are hooks") is None
+    assert cache.get("ReactJS", "what are portals") == "answer 2"
+    assert cache.stats()["entries"] == 2
@@ -1,43 +1,65 @@
-from crewai_tools import ScrapeWebsiteTool, WebsiteSearchTool
+import os
+from corpus import CORPUS_SOURCES
+
+# "snapshot" searches the local corpus (see corpus.py); "live" fetches the websites on every use
+INTERVIEW_TOOLS_MODE = os.getenv("INTERVIEW_TOOLS_MODE", "snapshot")
+
+if INTERVIEW_TOOLS_MODE == "live":
+    from crewai_tools import ScrapeWebsiteTool, WebsiteSearchTool
+
+    def scrape_tool(source, name, description):
+        return ScrapeWebsiteTool(url=CORPUS_SOURCES[source], name=name, description=description)
+
+    def search_tool(source, name, description):
+        return WebsiteSearchTool(url=CORPUS_SOURCES[source], name=name, description=description)
+else:
+    from corpus_tools import SnapshotSearchTool
+
+    # Offline, every source is served by hybrid retrieval over its prebuilt index (see search_index.py)
+    def scrape_tool(source, name, description):
+        return SnapshotSearchTool(source=source, name=name, description=description)
+
+    def search_tool(source, name, description):
+        return SnapshotSearchTool(source=source, name=name, description=description)
 
 # ReactJS Interview Questions Tool
-reactjs_tool = ScrapeWebsiteTool(
-    url='https://github.com/sudheerj/reactjs-interview-questions/blob/master/README.md',
+reactjs_tool = scrape_tool(
+    source='reactjs',
     name='ReactJS Interview Questions Tool',
     description='Tool to scrape and interact with ReactJS interview questions from the specified GitHub repository.'
 )
 
 # Angular Interview Questions Tool
-angular_tool = ScrapeWebsiteTool(
-    url='https://github.com/sudheerj/angular-interview-questions/blob/master/README.md',
+angular_tool = scrape_tool(
+    source='angular',
     name='Angular Interview Questions Tool',
     description='Tool to scrape and interact with Angular interview questions from the specified GitHub repository.'
 )
 
 # Vue.js Interview Questions Tool
-vuejs_tool = ScrapeWebsiteTool(
-    url='https://github.com/sudheerj/vuejs-interview-questions/blob/master/README.md',
+vuejs_tool = scrape_tool(
+    source='vuejs',
     name='Vue.js Interview Questions Tool',
     description='Tool to scrape and interact with Vue.js interview questions from the specified GitHub repository.'
 )
 
 # JavaScript Interview Questions Tool
-javascript_tool = ScrapeWebsiteTool(
-    url='https://github.com/ganqqwerty/123-Essential-JavaScript-Interview-Questions/blob/master/README.md',
+javascript_tool = scrape_tool(
+    source='javascript',
     name='JavaScript Interview Questions Tool',
     description='Tool to scrape and interact with JavaScript interview questions from the specified GitHub repository.'
 )
 
 # Full Stack Developer Interview Questions Tool
-fullstack_tool = WebsiteSearchTool(
-    url='https://www.geeksforgeeks.org/full-stack-developer-interview-questions-and-answers/',
+fullstack_tool = search_tool(
+    source='fullstack',
     name='Full Stack Developer Interview Questions Tool',
     description='Tool to scrape and interact with Full Stack Developer interview questions from GeeksforGeeks.'
 )
 
 # Data Science Interview Questions Tool
-datascience_tool = WebsiteSearchTool(
-    url='https://www.geeksforgeeks.org/data-science-interview-questions-and-answers/',
+datascience_tool = search_tool(
+    source='datascience',
     name='Data Science Interview Questions Tool',
     description='Tool to scrape and interact with Data Science interview questions from GeeksforGeeks.'
 )
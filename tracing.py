@@ -0,0 +1,256 @@
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+# Tracing configuration (overridable through environment variables)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_PATH = os.getenv("TRACE_PATH", "traces.jsonl")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 1.0))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", 20 * 1024 * 1024))
+
+logger = logging.getLogger(__name__)
+
+# Span currently open in this thread / task; None outside any trace, _NOOP_SPAN inside an unsampled one
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed stage of a request; spans sharing a trace_id form a tree through parent_id."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "_start_counter", "attributes")
+
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self._start_counter = time.perf_counter()
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        """Attach attributes discovered while the span is open (sizes, cache hits, ...)."""
+        self.attributes.update(attributes)
+
+    def to_dict(self, duration):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": duration,
+            "thread": threading.current_thread().name,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned for unsampled requests so instrumented code never has to check."""
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class TraceRecorder:
+    """Appends finished spans to a JSONL file from a background thread.
+
+    The hot path only puts a dict on a queue; serialization and file I/O happen
+    off the request thread. The file is rotated to `<path>.1` past max_bytes.
+    """
+
+    def __init__(self, path=TRACE_PATH, max_bytes=TRACE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._queue = queue.SimpleQueue()
+        threading.Thread(target=self._write_loop, name="trace-writer", daemon=True).start()
+
+    def record(self, span_dict):
+        self._queue.put(span_dict)
+
+    def flush(self, timeout=5.0):
+        """Block until every span recorded so far is on disk."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            spans = [item for item in batch if isinstance(item, dict)]
+            try:
+                if spans:
+                    self._write(spans)
+            except OSError as e:
+                logger.warning("Could not write %d trace spans: %s", len(spans), e)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _write(self, spans):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+            os.replace(self.path, f"{self.path}.1")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(span, default=str) + "\n" for span in spans))
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    """Return the process-wide trace recorder, starting its writer thread on first use."""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = TraceRecorder()
+    return _recorder
+
+
+@contextmanager
+def _open_span(name, parent, attributes):
+    current = Span(name, parent.trace_id if parent else uuid.uuid4().hex, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        get_recorder().record(current.to_dict(time.perf_counter() - current._start_counter))
+
+
+@contextmanager
+def _noop_span():
+    token = _current_span.set(_NOOP_SPAN)
+    try:
+        yield _NOOP_SPAN
+    finally:
+        _current_span.reset(token)
+
+
+def trace(name, **attributes):
+    """Start a trace at a request entry point (a nested span if a trace is already open).
+
+    A TRACE_SAMPLE_RATE fraction of new traces is recorded; spans inside an
+    unsampled trace cost only a context-variable lookup.
+    """
+    parent = _current_span.get()
+    if parent is None and (not TRACING_ENABLED or random.random() >= TRACE_SAMPLE_RATE):
+        return _noop_span()
+    return span(name, **attributes) if parent is not None else _open_span(name, None, attributes)
+
+
+def span(name, **attributes):
+    """Time a block as a child of the current span; outside a trace it records nothing.
+
+    Works in threads and coroutines alike: the current span is a context
+    variable, so asyncio tasks and asyncio.to_thread inherit it (see
+    bind_context for executors).
+    """
+    parent = _current_span.get()
+    if parent is None or parent is _NOOP_SPAN:
+        return nullcontext(_NOOP_SPAN)
+    return _open_span(name, parent, attributes)
+
+
+def traced(name, **attributes):
+    """Decorator form of trace() for the plain and async functions that serve a request."""
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with trace(name, **attributes):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with trace(name, **attributes):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """Return the open span (or a no-op stand-in) so nested code can annotate it."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def bind_context(function):
+    """Wrap a callable so it runs with the caller's context (and current span) on an executor thread."""
+    context = contextvars.copy_context()
+    return functools.partial(context.run, function)
+
+
+def _tail_lines(path, count, block_size=64 * 1024):
+    """Return the last `count` lines of a file, reading backwards so a large log is never loaded whole."""
+    blocks = []
+    newlines = 0
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        while position > 0 and newlines <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            blocks.append(f.read(step))
+            newlines += blocks[-1].count(b"\n")
+    lines = b"".join(reversed(blocks)).splitlines()
+    if position > 0:
+        lines = lines[1:]  # starts mid-line
+    return [line.decode("utf-8", errors="replace") for line in lines[-count:]]
+
+
+def load_traces(path=TRACE_PATH, limit=50, max_spans=20000):
+    """Return the most recent traces as {"trace_id", "name", "start", "duration", "spans"}, newest first.
+
+    Only the tail of the JSONL file (max_spans lines) is read.
+    """
+    if not os.path.exists(path):
+        return []
+    lines = _tail_lines(path, max_spans)
+
+    traces = OrderedDict()
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        traces.setdefault(record["trace_id"], []).append(record)
+
+    result = []
+    for trace_id, spans in reversed(traces.items()):
+        roots = [s for s in spans if s["parent_id"] is None]
+        if not roots:
+            continue  # the root has not finished yet, or was rotated out
+        root = roots[0]
+        result.append({
+            "trace_id": trace_id,
+            "name": root["name"],
+            "start": root["start"],
+            "duration": root["duration"],
+            "spans": sorted(spans, key=lambda s: s["start"]),
+        })
+        if len(result) >= limit:
+            break
+    return result